@@ -0,0 +1,81 @@
+"""
+MICRO-BENCHMARK - CLASSIFICADOR DE TIPO DE IMÓVEL
+Compara o classificador por tabela de regras com a versão antiga linha a linha
+
+Uso: python benchmarks/bench_classificador.py [linhas]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leads_core.classificador import classify_property_types
+
+def identify_property_type_legado(reference):
+    """Versão anterior (if/elif por linha), mantida aqui como referência"""
+    if pd.isna(reference) or reference == '':
+        return 'Indefinido'
+    
+    ref = str(reference).upper().strip()
+    
+    if ref.startswith('CA'):
+        return 'Casa'
+    elif ref.startswith('AP'):
+        return 'Apartamento'
+    elif ref.startswith('TR'):
+        return 'Terreno'
+    elif ref.startswith('CO'):
+        return 'Comercial'
+    elif ref in ['WIND OCEANICA', 'TRESOR CAMBOINHAS']:
+        return 'Lançamento'
+    
+    if 'CASA' in ref:
+        return 'Casa'
+    elif any(word in ref for word in ['APARTAMENTO', 'APT']):
+        return 'Apartamento'
+    elif 'TERRENO' in ref:
+        return 'Terreno'
+    elif any(word in ref for word in ['COMERCIAL', 'LOJA', 'SALA']):
+        return 'Comercial'
+    elif any(word in ref for word in ['LANÇAMENTO', 'LANCAMENTO']):
+        return 'Lançamento'
+    
+    return 'Outros'
+
+def synthetic_references(linhas, seed=42):
+    """Coluna sintética com a repetição típica de referências da planilha"""
+    rng = np.random.default_rng(seed)
+    catalogo = (
+        [f'CA{i:03d}' for i in range(300)] + [f'AP{i:03d}' for i in range(500)] +
+        [f'TR{i:02d}' for i in range(50)] + [f'CO{i:02d}' for i in range(80)] +
+        ['Wind Oceanica', 'Tresor Camboinhas', 'Casa na praia', 'Sala comercial',
+         'Loja centro', 'Lançamento Icaraí', 'Apt Niterói', '', 'Cobertura', 'Outro']
+    )
+    return pd.Series(rng.choice(catalogo, size=linhas))
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    referencias = synthetic_references(linhas)
+    
+    inicio = time.perf_counter()
+    legado = referencias.apply(identify_property_type_legado)
+    tempo_legado = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    novo = classify_property_types(referencias)
+    tempo_novo = time.perf_counter() - inicio
+    
+    assert legado.equals(novo), "Classificações divergentes"
+    
+    print(f"Linhas: {linhas:,} ({referencias.nunique()} referências distintas)")
+    print(f"Legado (.apply):        {tempo_legado:8.3f} s")
+    print(f"Tabela de regras:       {tempo_novo:8.3f} s")
+    print(f"Ganho:                  {tempo_legado / tempo_novo:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+BENCHMARK - EXPORTAÇÃO DE LEADS
+Pico de memória (RSS) ao exportar N leads: CSV montado inteiro em memória
+(versão antiga do download) contra a exportação em lotes
+
+Cada modo roda em um processo separado, para um pico não contaminar o outro.
+
+Uso: python benchmarks/bench_export.py [linhas]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+MODOS = ['legado', 'csv', 'csv.gz', 'parquet', 'csv.gz (bytes)']
+
+def synthetic_leads(linhas, seed=42):
+    """Leads sintéticos já com o schema compacto do dashboard"""
+    from leads_core.classificador import classify_property_types
+    from leads_core.limpeza import apply_schema
+    
+    rng = np.random.default_rng(seed)
+    referencias = np.array(
+        [f'CA{i:03d}' for i in range(300)] + [f'AP{i:03d}' for i in range(500)] +
+        [f'TR{i:02d}' for i in range(50)] + ['Wind Oceanica', 'Tresor Camboinhas', '']
+    )
+    inicio = pd.Timestamp('2023-01-01').value
+    minutos = rng.integers(0, 3 * 365 * 24 * 60, size=linhas)
+    
+    df = pd.DataFrame({
+        'Data/Hora': pd.to_datetime(inicio + minutos * 60_000_000_000),
+        'Nome': pd.Series(np.arange(linhas)).map('Pessoa {}'.format),
+        'Telefone': (21_900_000_000 + rng.integers(0, 99_999_999, size=linhas)).astype(str),
+        'Imóvel/Referência': rng.choice(referencias, size=linhas),
+        'Interesse Visita': rng.choice(['sim', 'não', ''], size=linhas),
+        'Status': rng.choice(['Novo', 'Contatado', 'Visitou'], size=linhas),
+        'Origem': rng.choice(['Site', 'Instagram', 'Indicação'], size=linhas),
+    })
+    df['Tipo Imóvel'] = classify_property_types(df['Imóvel/Referência'])
+    df['Interesse_Bool'] = df['Interesse Visita'].eq('sim')
+    return apply_schema(df.sort_values('Data/Hora', ignore_index=True))
+
+def _kb_status(campo):
+    """Campo do /proc/self/status em KB (VmRSS, VmHWM)"""
+    with open('/proc/self/status') as status:
+        for linha in status:
+            if linha.startswith(campo + ':'):
+                return int(linha.split()[1])
+    return 0
+
+def run_mode(modo, linhas):
+    """Executa um modo (no processo filho) e imprime: rss_base pico segundos bytes"""
+    import ctypes
+    import gc
+    
+    from leads_core.config import COLUNAS_EXIBIR
+    from leads_core.tabela import format_leads_for_display
+    from leads_core.exportacao import export_bytes, export_to_tempfile
+    
+    df = synthetic_leads(linhas)
+    gc.collect()
+    # Devolver ao sistema a memória livre da geração, senão a exportação a reaproveita
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except OSError:
+        pass
+    
+    # Zera o pico (VmHWM) para medir só a exportação
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+    base = _kb_status('VmRSS')
+    
+    inicio = time.perf_counter()
+    if modo == 'legado':
+        tamanho = len(format_leads_for_display(df).to_csv(index=False).encode('utf-8'))
+    elif modo.endswith('(bytes)'):
+        tamanho = len(export_bytes(df, modo.split()[0], COLUNAS_EXIBIR))
+    else:
+        caminho = export_to_tempfile(df, modo, COLUNAS_EXIBIR)
+        tamanho = os.path.getsize(caminho)
+        os.remove(caminho)
+    segundos = time.perf_counter() - inicio
+    
+    print(base, _kb_status('VmHWM'), segundos, tamanho)
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--modo':
+        run_mode(sys.argv[2], int(sys.argv[3]))
+        return
+    
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Linhas: {linhas:,}")
+    print(f"{'Modo':<16} {'RSS base':>10} {'Pico':>10} {'Extra':>10} {'Tempo':>8} {'Arquivo':>10}")
+    
+    for modo in MODOS:
+        saida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--modo', modo, str(linhas)],
+            capture_output=True, text=True, check=True
+        ).stdout.split('\n')[-2]
+        base, pico, segundos, tamanho = saida.split()
+        base, pico, tamanho = int(base), int(pico), int(tamanho)
+    
+        print(f"{modo:<16} {base / 1024:8.0f}MB {pico / 1024:8.0f}MB {(pico - base) / 1024:8.0f}MB "
+              f"{float(segundos):7.2f}s {tamanho / 1024 ** 2:8.1f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+BENCHMARK - PIPELINE COMPLETO
+Carga (planilha falsa), limpeza, filtros e cada função de gráfico em 1k/100k/1M
+leads sintéticos, sem acessar o Google Sheets
+
+Os tempos vão para benchmarks/resultados/<versão>.json (versão = commit atual,
+se não informada) e são comparados com o resultado anterior mais recente.
+
+Uso: python benchmarks/bench_pipeline.py [--tamanhos 1000,100000] [--versao X] [--comparar arquivo.json]
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Snapshot do benchmark isolado do cache real (lido na importação de leads_core.config)
+CACHE_BENCH = tempfile.mkdtemp(prefix='leads_bench_')
+os.environ['LEADS_CACHE_DIR'] = CACHE_BENCH
+# Streamlit fora do servidor: sem os avisos de "missing ScriptRunContext"
+logging.disable(logging.WARNING)
+
+import numpy as np
+import pandas as pd
+
+import dashboard_streamlit as dash
+from leads_core import config
+from leads_core.agregacoes import LeadsDataset
+from leads_core.carregador import load_snapshot, refresh_snapshot
+from leads_core.limpeza import clean_leads
+from dados_sinteticos import HEADERS, synthetic_rows, synthetic_sheet
+from fake_sheets import FakeSheetsClient, FakeSpreadsheet
+
+RESULTADOS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+TAMANHOS_PADRAO = [1_000, 100_000, 1_000_000]
+# Variação tolerada antes de apontar regressão na comparação (cenários sub-milissegundo são ruído)
+LIMITE_REGRESSAO = 1.2
+LIMITE_ABSOLUTO = 0.001
+
+GRAFICOS = [
+    'create_property_type_chart', 'create_interest_analysis', 'create_timeline_chart',
+    'create_hourly_analysis', 'create_advanced_analysis',
+]
+
+def measure(funcao, repeticoes):
+    """Executa `funcao` algumas vezes; devolve (mínimo, mediana) em segundos e o último retorno"""
+    tempos = []
+    retorno = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        retorno = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), float(np.median(tempos)), retorno
+
+def run_scenarios(linhas, seed=42):
+    """Todos os cenários para um tamanho; devolve {cenário: {'min': s, 'mediana': s}}"""
+    resultados = {}
+    pesado = linhas >= 1_000_000
+    rep_carga = 1 if pesado else 3
+    rep_leve = 3 if pesado else 7
+    
+    def registrar(cenario, funcao, repeticoes):
+        minimo, mediana, retorno = measure(funcao, repeticoes)
+        resultados[cenario] = {'min': round(minimo, 6), 'mediana': round(mediana, 6)}
+        print(f"  {cenario:<42} {mediana * 1000:12.2f} ms")
+        return retorno
+    
+    valores = synthetic_sheet(linhas, seed)
+    planilha = FakeSpreadsheet({'Leads_Todos_Imoveis': valores})
+    cliente = FakeSheetsClient(planilha)
+    
+    def carga_completa():
+        if os.path.exists(config.SNAPSHOT_PATH):
+            os.remove(config.SNAPSHOT_PATH)
+        return refresh_snapshot(cliente)[0]
+    
+    snapshot = registrar('carga.completa', carga_completa, rep_carga)
+    registrar('carga.ociosa', lambda: refresh_snapshot(cliente, snapshot), rep_leve)
+    registrar('carga.leitura_snapshot', load_snapshot, rep_carga)
+    
+    # 1% de linhas novas por ciclo
+    novas = synthetic_rows(max(linhas // 100, 1), seed + 1, inicio='2026-01-01', dias=30)
+    def carga_incremental():
+        planilha.append_rows('Leads_Todos_Imoveis', novas)
+        return refresh_snapshot(cliente, snapshot)[0]
+    incremental = registrar('carga.incremental_1pct', carga_incremental, 1)
+    
+    registrar('limpeza.clean_leads', lambda: clean_leads(HEADERS, valores[1:]), rep_carga)
+    
+    dataset = registrar(
+        'dataset.montar', lambda: LeadsDataset.from_snapshot(snapshot, datetime.now(config.TIMEZONE)), rep_carga
+    )
+    # Dataset publicado após a sincronização incremental: só as linhas anexadas entram nos índices
+    anexadas = incremental['df'].iloc[len(snapshot['df']):]
+    registrar(
+        'dataset.estender_1pct',
+        lambda: dataset.extended(incremental, anexadas, datetime.now(config.TIMEZONE)), rep_carga
+    )
+    
+    data_max = dataset.cubo['Data'].max().date()
+    periodo = (data_max - timedelta(days=30), data_max)
+    filtros = {
+        'todos': (None, 'Todos', 'Todos'),
+        'periodo_30d': (periodo, 'Todos', 'Todos'),
+        'tipo_casa': (None, 'Casa', 'Todos'),
+        'com_interesse': (None, 'Todos', 'Apenas com interesse'),
+        'combinado': (periodo, 'Apartamento', 'Apenas sem interesse'),
+    }
+    for nome, args in filtros.items():
+        registrar(f'filtro.{nome}', lambda args=args: dataset.filter(*args), rep_leve)
+    
+    # Gráficos sem o cache de figuras (chave=None): custo real de montar e serializar
+    df, cubo, referencias = dataset.filter(None, 'Todos', 'Todos')
+    registrar('grafico.create_metrics_cards', lambda: dash.create_metrics_cards(cubo, referencias, df), rep_leve)
+    for nome in GRAFICOS:
+        funcao = getattr(dash, nome)
+        registrar(f'grafico.{nome}', lambda funcao=funcao: funcao(cubo), rep_leve)
+    registrar('grafico.create_referencia_analysis', lambda: dash.create_referencia_analysis(referencias), rep_leve)
+    registrar('tabela.create_leads_table', lambda: dash.create_leads_table(df, dataset.total_linhas, dataset.df), rep_leve)
+    
+    return resultados
+
+def current_version():
+    """Commit atual (com -dirty se houver alterações) ou 'local' fora de um repositório git"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        sujo = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--', '.'], cwd=RAIZ).returncode != 0
+        return commit + ('-dirty' if sujo else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'local'
+
+def latest_result(exceto):
+    """Resultado gravado mais recente, exceto o arquivo informado"""
+    arquivos = [a for a in glob.glob(os.path.join(RESULTADOS_DIR, '*.json')) if os.path.abspath(a) != os.path.abspath(exceto)]
+    return max(arquivos, key=os.path.getmtime) if arquivos else None
+
+def compare(atual, anterior):
+    """Imprime a razão atual/anterior por cenário e aponta regressões"""
+    print(f"\nComparação com {anterior['versao']} ({anterior['executado_em']}):")
+    regressoes = 0
+    for tamanho, cenarios in atual['resultados'].items():
+        base = anterior['resultados'].get(tamanho, {})
+        for cenario, tempos in cenarios.items():
+            if cenario not in base or not base[cenario]['mediana']:
+                continue
+            razao = tempos['mediana'] / base[cenario]['mediana']
+            lenta = razao > LIMITE_REGRESSAO and tempos['mediana'] - base[cenario]['mediana'] > LIMITE_ABSOLUTO
+            marca = '  <-- regressão' if lenta else ''
+            regressoes += bool(marca)
+            print(f"  {tamanho:>9} {cenario:<42} {razao:6.2f}x{marca}")
+    print(f"{regressoes} cenário(s) mais de {LIMITE_REGRESSAO - 1:.0%} mais lento(s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanhos', default=','.join(map(str, TAMANHOS_PADRAO)))
+    parser.add_argument('--versao', default=None)
+    parser.add_argument('--comparar', default=None, help='resultado JSON de referência')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    tamanhos = [int(t) for t in args.tamanhos.split(',')]
+    versao = args.versao or current_version()
+    saida = {
+        'versao': versao,
+        'executado_em': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'resultados': {},
+    }
+    
+    try:
+        for linhas in tamanhos:
+            print(f"\n{linhas:,} linhas")
+            saida['resultados'][str(linhas)] = run_scenarios(linhas, args.seed)
+    finally:
+        shutil.rmtree(CACHE_BENCH, ignore_errors=True)
+    
+    os.makedirs(RESULTADOS_DIR, exist_ok=True)
+    caminho = os.path.join(RESULTADOS_DIR, f'{versao}.json')
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(saida, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {caminho}")
+    
+    referencia = args.comparar or latest_result(caminho)
+    if referencia:
+        with open(referencia, encoding='utf-8') as arquivo:
+            compare(saida, json.load(arquivo))
+
+if __name__ == "__main__":
+    main()
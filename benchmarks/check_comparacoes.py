@@ -0,0 +1,84 @@
+"""
+VERIFICAÇÃO - AGREGADOS DE COMPARAÇÃO
+Confere que RollingAggregates atualizado só com as linhas novas (inclusive um
+lote sem nenhum lead já conhecido) é igual aos agregados refeitos do zero, e
+que os totais por janela batem com o cubo da página
+
+Uso: python benchmarks/check_comparacoes.py [linhas]
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Snapshot isolado do cache real (lido na importação de leads_core.config)
+CACHE_CHECK = tempfile.mkdtemp(prefix='leads_check_')
+os.environ['LEADS_CACHE_DIR'] = CACHE_CHECK
+logging.disable(logging.WARNING)
+
+import pandas as pd
+
+from leads_core import config
+from leads_core.agregacoes import LeadsDataset
+from leads_core.carregador import refresh_snapshot
+from leads_core.comparacoes import RollingAggregates
+from dados_sinteticos import synthetic_rows, synthetic_sheet
+from fake_sheets import FakeSheetsClient, FakeSpreadsheet
+
+ABA = 'Leads_Todos_Imoveis'
+
+def assert_same(incremental, completo, etapa):
+    """Mesmos buckets diários, resumo por lead e coortes"""
+    pd.testing.assert_frame_equal(incremental.diario.sort_index(), completo.diario.sort_index(), obj=f'{etapa}: diario')
+    pd.testing.assert_frame_equal(incremental.leads.sort_index(), completo.leads.sort_index(), obj=f'{etapa}: leads')
+    pd.testing.assert_series_equal(incremental.coortes.sort_index(), completo.coortes.sort_index(), obj=f'{etapa}: coortes')
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    planilha = FakeSpreadsheet({ABA: synthetic_sheet(linhas, inicio='2025-01-01', dias=120)})
+    try:
+        snapshot = refresh_snapshot(FakeSheetsClient(planilha))[0]
+        antigos = snapshot['df']
+        # Leads novos e contatos repetidos de leads antigos (mesma linha, data nova)
+        repetidos = [[f'{10 + i % 15:02d}/05/2025 10:00:00', *linha[1:]] for i, linha in enumerate(planilha.abas[ABA][1:51])]
+        planilha.append_rows(ABA, synthetic_rows(linhas // 10, 99, inicio='2025-05-01', dias=20) + repetidos)
+        df = refresh_snapshot(FakeSheetsClient(planilha), snapshot)[0]['df']
+    finally:
+        shutil.rmtree(CACHE_CHECK, ignore_errors=True)
+    
+    novas = df.iloc[len(antigos):]
+    base = RollingAggregates.from_frame(antigos)
+    
+    # Lote só com leads nunca vistos: as coortes antigas não têm o que descontar
+    ineditos = novas[~novas['Lead_ID'].isin(antigos['Lead_ID'])]
+    assert len(ineditos), "lote sem leads novos"
+    assert_same(base.updated(ineditos), RollingAggregates.from_frame(pd.concat([antigos, ineditos])), 'só leads novos')
+    
+    # Lote misturado (leads novos e contatos repetidos)
+    assert_same(base.updated(novas), RollingAggregates.from_frame(df), 'lote completo')
+    
+    # Totais da janela = mesma janela filtrada no cubo (e na tabela por referência)
+    dataset = LeadsDataset.from_snapshot({**snapshot, 'df': df, 'agregados': None}, datetime.now(config.TIMEZONE))
+    fim = dataset.cubo['Data'].max().date()
+    periodo = (fim - timedelta(days=29), fim)
+    for tipo, interesse in [('Todos', 'Todos'), ('Lançamento', 'Todos'), ('Todos', 'Apenas com interesse')]:
+        totais = dataset.agregados.window_totals(*periodo, tipo, interesse)
+        _, cubo, referencias = dataset.filter(periodo, tipo, interesse)
+        por_ref = referencias.groupby('Imóvel/Referência', observed=True)['Leads'].sum()
+        assert referencias['Leads'].sum() == cubo['Leads'].sum(), (tipo, interesse)
+        assert totais['Leads'] == cubo['Leads'].sum(), (tipo, interesse)
+        assert totais['Com_Interesse'] == cubo['Com_Interesse'].sum(), (tipo, interesse)
+        for referencia in config.REFERENCIAS_DESTAQUE:
+            assert totais[referencia] == por_ref.get(referencia, 0), (tipo, interesse, referencia)
+    
+    print(f"Agregados incrementais conferem: {len(ineditos)} leads novos, {len(novas)} linhas no lote")
+
+if __name__ == "__main__":
+    main()
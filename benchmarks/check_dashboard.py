@@ -0,0 +1,78 @@
+"""
+VERIFICAÇÃO - PÁGINA COMPLETA
+Renderiza o dashboard inteiro com streamlit.testing (AppTest) sobre a planilha
+falsa, sem acessar o Google Sheets; falha se a página levantar exceção
+
+Uso: python benchmarks/check_dashboard.py [linhas]
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Snapshot e histórico isolados do cache real (lidos na importação de leads_core.config)
+CACHE_CHECK = tempfile.mkdtemp(prefix='leads_check_')
+os.environ['LEADS_CACHE_DIR'] = CACHE_CHECK
+# Sem os avisos de depreciação do Streamlit; exceções da página continuam em app.exception
+logging.disable(logging.WARNING)
+
+from streamlit.testing.v1 import AppTest
+
+from leads_core.telemetria import start_metrics_server
+
+def page_script(raiz, pasta_benchmarks, linhas):
+    """Script da página: o dashboard real, com o cliente da planilha trocado pela planilha falsa"""
+    import sys
+    sys.path[:0] = [raiz, pasta_benchmarks]
+    
+    import dashboard_streamlit as dash
+    from dados_sinteticos import synthetic_sheet
+    from fake_sheets import FakeSheetsClient, FakeSpreadsheet
+    
+    planilha = FakeSpreadsheet({'Leads_Todos_Imoveis': synthetic_sheet(linhas, inicio='2025-01-01', dias=120)})
+    dash.create_sheets_client = lambda: FakeSheetsClient(planilha)
+    dash.main()
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    try:
+        app = AppTest.from_function(
+            page_script, args=(RAIZ, os.path.dirname(os.path.abspath(__file__)), linhas), default_timeout=120
+        )
+        app.run()
+        
+        assert not app.exception, [excecao.value for excecao in app.exception]
+        assert not app.error, [erro.value for erro in app.error]
+        metricas = {metrica.label: metrica.value for metrica in app.metric}
+        assert int(metricas['Total de Leads']) > 0, metricas
+        # Delta do período selecionado contra a janela anterior de mesma duração
+        assert app.metric[0].proto.delta.endswith('vs mês anterior'), app.metric[0].proto.delta
+        
+        # Mudar um filtro roda a página de novo sobre o mesmo dataset
+        app.sidebar.radio[0].set_value("Apenas com interesse").run()
+        assert not app.exception, [excecao.value for excecao in app.exception]
+        
+        # ?admin=1 na URL não liga o painel de admin (só LEADS_ADMIN=1 no servidor)
+        app.query_params['admin'] = '1'
+        app.run()
+        assert not [painel for painel in app.sidebar.expander if 'admin' in painel.label], app.sidebar.expander
+        
+        # Endpoint de métricas só em localhost por padrão
+        servidor = start_metrics_server(0)
+        assert servidor.server_address[0] == '127.0.0.1', servidor.server_address
+        servidor.shutdown()
+    finally:
+        shutil.rmtree(CACHE_CHECK, ignore_errors=True)
+    
+    print(f"Página renderizada: {len(app.metric)} métricas, {len(app.get('plotly_chart'))} gráficos")
+    for rotulo, valor in metricas.items():
+        print(f"  {rotulo:<22} {valor}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+VERIFICAÇÃO - CLIENTE GOOGLE SHEETS
+Confere o SheetsClient com credenciais e gspread falsos: uma única
+autorização entre ciclos, token renovado só dentro da margem de 10 minutos
+e lista de abas relida só depois de invalidate()
+
+Uso: python benchmarks/check_sheets_client.py
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import types
+from datetime import datetime, timedelta, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Snapshot isolado do cache real (lido na importação de leads_core.config)
+CACHE_CHECK = tempfile.mkdtemp(prefix='leads_check_')
+os.environ['LEADS_CACHE_DIR'] = CACHE_CHECK
+logging.disable(logging.WARNING)
+
+from leads_core import sheets_client
+from leads_core.carregador import refresh_snapshot
+from leads_core.sheets_client import TOKEN_MARGEM, SheetsClient
+from dados_sinteticos import synthetic_rows, synthetic_sheet
+from fake_sheets import FakeSpreadsheet
+
+ABA = 'Leads_Todos_Imoveis'
+CICLOS = 5
+
+def utc_now():
+    """Agora em UTC sem timezone, como o google-auth guarda `expiry`"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class FakeCredentials:
+    """Credenciais de service account falsas: refresh() só conta e empurra a validade 1 hora"""
+    
+    renovacoes = 0
+    
+    def __init__(self):
+        self.token = None
+        self.expiry = None
+    
+    @classmethod
+    def from_service_account_info(cls, info, scopes=None):
+        return cls()
+    
+    @property
+    def valid(self):
+        return self.token is not None and (self.expiry is None or self.expiry > utc_now())
+    
+    def refresh(self, request):
+        self.renovacoes += 1
+        self.token = f'token-{self.renovacoes}'
+        self.expiry = utc_now() + timedelta(hours=1)
+
+class FakeGspread:
+    """Módulo gspread falso: conta authorize() e open_by_key() sobre a planilha falsa"""
+    
+    def __init__(self, planilha):
+        self.planilha = planilha
+        self.autorizacoes = 0
+        self.aberturas = 0
+    
+    def authorize(self, credenciais):
+        self.autorizacoes += 1
+        return types.SimpleNamespace(open_by_key=self.open_by_key)
+    
+    def open_by_key(self, chave):
+        self.aberturas += 1
+        return self.planilha
+
+def main():
+    planilha = FakeSpreadsheet({ABA: synthetic_sheet(200), 'Outra aba': [['x']]})
+    gspread_falso = FakeGspread(planilha)
+    sheets_client.gspread = gspread_falso
+    sheets_client.Credentials = FakeCredentials
+    
+    try:
+        cliente = SheetsClient({}, 'planilha-falsa', [ABA, 'Leads_Lancamentos'])
+        credenciais = cliente._creds
+        
+        # Vários ciclos de atualização: autoriza e lista as abas uma vez só; token válido não é renovado
+        snapshot = None
+        for ciclo in range(CICLOS):
+            planilha.append_rows(ABA, synthetic_rows(3, ciclo, inicio='2026-01-01', dias=1))
+            snapshot, _ = refresh_snapshot(cliente, snapshot)
+        assert [aba.title for aba in cliente.worksheets()] == [ABA]
+        assert gspread_falso.autorizacoes == 1, gspread_falso.autorizacoes
+        assert gspread_falso.aberturas == 1, gspread_falso.aberturas
+        assert credenciais.renovacoes == 1, credenciais.renovacoes
+        
+        # Fora da margem: não renova
+        credenciais.expiry = utc_now() + TOKEN_MARGEM + timedelta(minutes=10)
+        cliente.worksheets()
+        assert credenciais.renovacoes == 1, credenciais.renovacoes
+        
+        # Dentro da margem (ainda válido, mas a menos de 10 minutos de expirar): renova antes da leitura
+        credenciais.expiry = utc_now() + TOKEN_MARGEM - timedelta(minutes=5)
+        refresh_snapshot(cliente, snapshot)
+        assert credenciais.renovacoes == 2, credenciais.renovacoes
+        assert credenciais.expiry - utc_now() > TOKEN_MARGEM
+        
+        # Aba criada depois: só aparece após invalidate(), que relê a lista sem autorizar de novo
+        planilha.abas['Leads_Lancamentos'] = [['Data/Hora']]
+        assert [aba.title for aba in cliente.worksheets()] == [ABA]
+        cliente.invalidate()
+        assert [aba.title for aba in cliente.worksheets()] == [ABA, 'Leads_Lancamentos']
+        assert gspread_falso.aberturas == 2, gspread_falso.aberturas
+        assert gspread_falso.autorizacoes == 1, gspread_falso.autorizacoes
+    finally:
+        shutil.rmtree(CACHE_CHECK, ignore_errors=True)
+    
+    print(f"SheetsClient: {gspread_falso.autorizacoes} autorização, {credenciais.renovacoes} renovações de token, "
+          f"{gspread_falso.aberturas} leituras da lista de abas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+VERIFICAÇÃO - SINCRONIZAÇÃO INCREMENTAL
+Confere na planilha falsa que a sincronização incremental só aproveita o
+snapshot quando a aba cresceu no final; remoções, inserções e edições caem
+na leitura completa e o resultado bate com uma carga do zero
+
+Uso: python benchmarks/check_sync.py [linhas]
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Snapshot isolado do cache real (lido na importação de leads_core.config)
+CACHE_CHECK = tempfile.mkdtemp(prefix='leads_check_')
+os.environ['LEADS_CACHE_DIR'] = CACHE_CHECK
+logging.disable(logging.WARNING)
+
+from leads_core import carregador, config
+from leads_core.agregacoes import LeadsDataset
+from leads_core.carregador import load_snapshot, refresh_snapshot
+from dados_sinteticos import HEADERS, synthetic_rows, synthetic_sheet
+from fake_sheets import FakeSheetsClient, FakeSpreadsheet
+
+ABA = 'Leads_Todos_Imoveis'
+
+def full_load(planilha):
+    """Snapshot de uma carga do zero, sem o arquivo local"""
+    if os.path.exists(config.SNAPSHOT_PATH):
+        os.remove(config.SNAPSHOT_PATH)
+    return refresh_snapshot(FakeSheetsClient(planilha))[0]
+
+def sync(planilha, cliente, snapshot):
+    """Uma sincronização; devolve (snapshot, linhas novas, chamadas values_batch_get)"""
+    planilha.chamadas.clear()
+    snapshot, novas = refresh_snapshot(cliente, snapshot)
+    return snapshot, novas, sum(chamada[0] == 'values_batch_get' for chamada in planilha.chamadas)
+
+def isolated_full_load(planilha):
+    """Carga do zero gravada em outra pasta: o snapshot sincronizado (base + deltas) fica intacto"""
+    caminhos = config.SNAPSHOT_PATH, config.SNAPSHOT_DELTAS_DIR
+    pasta = tempfile.mkdtemp(dir=CACHE_CHECK)
+    config.SNAPSHOT_PATH = os.path.join(pasta, 'leads_snapshot.parquet')
+    config.SNAPSHOT_DELTAS_DIR = os.path.join(pasta, 'leads_snapshot.deltas')
+    try:
+        return refresh_snapshot(FakeSheetsClient(planilha))[0]
+    finally:
+        config.SNAPSHOT_PATH, config.SNAPSHOT_DELTAS_DIR = caminhos
+
+def assert_matches_full_load(planilha, snapshot, etapa):
+    """O snapshot sincronizado tem as mesmas linhas que uma carga do zero da planilha atual"""
+    esperado = isolated_full_load(FakeSpreadsheet({ABA: [list(linha) for linha in planilha.abas[ABA]]}))
+    assert len(snapshot['df']) == len(esperado['df']), (etapa, len(snapshot['df']), len(esperado['df']))
+    colunas = ['Data/Hora', 'Telefone', 'Status']
+    obtido = snapshot['df'][colunas].astype(str).sort_values(colunas, ignore_index=True)
+    assert obtido.equals(esperado['df'][colunas].astype(str).sort_values(colunas, ignore_index=True)), etapa
+
+def assert_extended_dataset(anterior, snapshot, etapa):
+    """Dataset anterior estendido com as linhas anexadas = dataset montado do zero do snapshot novo"""
+    agora = datetime.now(config.TIMEZONE)
+    estendido = LeadsDataset.from_snapshot(anterior, agora).extended(snapshot, snapshot['df'].iloc[len(anterior['df']):], agora)
+    completo = LeadsDataset.from_snapshot(snapshot, agora)
+    assert estendido.versao == completo.versao, etapa
+    pd.testing.assert_frame_equal(estendido.df, completo.df, obj=etapa)
+    
+    # Cubo e referências podem repetir células: comparados pelas somas
+    fim = completo.cubo['Data'].max().date()
+    for filtros in [(None, 'Todos', 'Todos'), ((fim.replace(day=1), fim), 'Todos', 'Apenas com interesse')]:
+        for obtido, esperado, chaves in zip(estendido.filter(*filtros)[1:], completo.filter(*filtros)[1:],
+                                            [['Data', 'Hora', 'Tipo Imóvel'], ['Data', 'Imóvel/Referência']]):
+            somar = lambda tabela: tabela.groupby(chaves, observed=True)[['Leads', 'Com_Interesse', 'Primeiros_Contatos']].sum()
+            pd.testing.assert_frame_equal(somar(obtido), somar(esperado), obj=etapa)
+
+def check_failed_write(planilha, cliente, snapshot):
+    """Gravação do delta falha uma vez: o snapshot anterior fica intacto e a nova tentativa marca os primeiros contatos"""
+    planilha.append_rows(ABA, synthetic_rows(15, 13, inicio='2026-02-15', dias=1))
+    identidades, deltas = len(snapshot['identidades']), snapshot['deltas']
+    
+    gravar = carregador._write_parquet
+    def falhar(*args, **kwargs):
+        raise OSError("disco cheio (simulado)")
+    carregador._write_parquet = falhar
+    try:
+        sync(planilha, cliente, snapshot)
+    except OSError:
+        pass
+    else:
+        raise AssertionError("gravação simulada não falhou")
+    finally:
+        carregador._write_parquet = gravar
+    assert (len(snapshot['identidades']), snapshot['deltas']) == (identidades, deltas)
+    
+    novo, novas, _ = sync(planilha, cliente, snapshot)
+    assert novas == 15, novas
+    lote = novo['df'].iloc[len(snapshot['df']):]
+    esperado = ~lote['Lead_ID'].isin(snapshot['df']['Lead_ID']) & ~lote['Lead_ID'].duplicated()
+    assert esperado.any() and (lote['Primeiro_Contato'] == esperado).all(), lote[['Lead_ID', 'Primeiro_Contato']]
+    return novo
+
+def check_deltas(planilha, cliente, snapshot):
+    """Cada sincronização incremental grava um delta; após SNAPSHOT_DELTAS_MAX deltas o snapshot é compactado"""
+    def deltas():
+        return sorted(os.listdir(config.SNAPSHOT_DELTAS_DIR)) if os.path.isdir(config.SNAPSHOT_DELTAS_DIR) else []
+    
+    base = os.path.getmtime(config.SNAPSHOT_PATH)
+    # As sincronizações incrementais anteriores já deixaram seus deltas
+    for ciclo in range(len(deltas()) + 1, config.SNAPSHOT_DELTAS_MAX + 2):
+        planilha.append_rows(ABA, synthetic_rows(3, 100 + ciclo, inicio='2026-03-01', dias=1))
+        snapshot, novas, _ = sync(planilha, cliente, snapshot)
+        assert novas == 3, novas
+        if ciclo <= config.SNAPSHOT_DELTAS_MAX:
+            assert len(deltas()) == ciclo, (ciclo, deltas())
+            assert os.path.getmtime(config.SNAPSHOT_PATH) == base, ciclo
+        # O que está no disco (base + deltas) é o snapshot em memória (a ordem das categorias pode variar)
+        lido = load_snapshot()
+        pd.testing.assert_frame_equal(lido['df'], snapshot['df'], check_categorical=False, obj=f'delta {ciclo}')
+        assert lido['linhas_lidas'] == snapshot['linhas_lidas'], ciclo
+    
+    # Compactado: base regravado com tudo, sem deltas
+    assert deltas() == [], deltas()
+    return snapshot
+
+def check_extra_headers(extras, etapa):
+    """Aba com colunas extras de cabeçalho vazio ou repetido: snapshot salvo e incremental funcionando"""
+    def com_extras(linhas, valor):
+        # Linhas curtas completadas até as colunas extras; linhas em branco continuam em branco
+        return [(linha + [''] * len(HEADERS))[:len(HEADERS)] + [valor] * len(extras) if any(linha) else linha
+                for linha in linhas]
+    
+    planilha = FakeSpreadsheet({ABA: [HEADERS + extras] + com_extras(synthetic_rows(200, 11), 'x')})
+    snapshot = full_load(planilha)
+    colunas = list(snapshot['df'].columns)
+    assert len(colunas) == len(set(colunas)), (etapa, colunas)
+    assert os.path.exists(config.SNAPSHOT_PATH), etapa
+    
+    planilha.append_rows(ABA, com_extras(synthetic_rows(5, 12, inicio='2026-01-01', dias=1), 'y'))
+    snapshot, novas, leituras = sync(planilha, FakeSheetsClient(planilha), snapshot)
+    assert (novas, leituras) == (5, 1), (etapa, novas, leituras)
+    assert_matches_full_load(planilha, snapshot, etapa)
+    return colunas[len(HEADERS):len(HEADERS) + len(extras)]
+
+def main():
+    linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    planilha = FakeSpreadsheet({ABA: synthetic_sheet(linhas)})
+    cliente = FakeSheetsClient(planilha)
+    try:
+        snapshot = full_load(planilha)
+        
+        # Só linhas novas no final: incremental, uma única leitura
+        planilha.append_rows(ABA, synthetic_rows(20, 7, inicio='2026-01-01', dias=5))
+        anterior = snapshot
+        snapshot, novas, leituras = sync(planilha, cliente, snapshot)
+        assert (novas, leituras) == (20, 1), (novas, leituras)
+        assert_matches_full_load(planilha, snapshot, 'anexadas')
+        
+        # Lote com datas anteriores às já vistas e leads repetidos do snapshot: intercalados e deduplicados
+        planilha.append_rows(ABA, synthetic_rows(30, 9) + [list(linha) for linha in planilha.abas[ABA][10:15]])
+        intermediario = snapshot
+        snapshot, novas, _ = sync(planilha, cliente, snapshot)
+        assert novas == 35, novas
+        assert_matches_full_load(planilha, snapshot, 'fora de ordem')
+        assert_extended_dataset(anterior, intermediario, 'dataset estendido')
+        assert_extended_dataset(intermediario, snapshot, 'dataset estendido fora de ordem')
+        
+        # Falha ao gravar o delta e nova tentativa
+        snapshot = check_failed_write(planilha, cliente, snapshot)
+        assert_matches_full_load(planilha, snapshot, 'gravação repetida')
+        
+        # Deltas no disco e compactação
+        snapshot = check_deltas(planilha, cliente, snapshot)
+        assert_matches_full_load(planilha, snapshot, 'compactado')
+        
+        # Nada mudou: nenhuma leitura completa
+        snapshot, novas, leituras = sync(planilha, cliente, snapshot)
+        assert (novas, leituras) == (0, 1), (novas, leituras)
+        
+        # Metade das linhas arquivada e leads novos anexados: a marca d'água por contagem perderia os novos
+        planilha.delete_rows(ABA, 2, linhas // 2 + 1)
+        planilha.append_rows(ABA, synthetic_rows(20, 8, inicio='2026-02-01', dias=5))
+        snapshot, novas, leituras = sync(planilha, cliente, snapshot)
+        assert leituras == 3, leituras  # incremental descartado + cabeçalhos + dados
+        assert_matches_full_load(planilha, snapshot, 'arquivadas')
+        
+        # Status editado em uma linha antiga (sem linhas novas)
+        editada = list(planilha.abas[ABA][5]) + [''] * len(HEADERS)
+        editada[HEADERS.index('Status')] = 'Vendido'
+        planilha.update_row(ABA, 6, editada[:len(HEADERS)])
+        snapshot, novas, leituras = sync(planilha, cliente, snapshot)
+        assert leituras == 3, leituras
+        assert (snapshot['df']['Status'] == 'Vendido').any()
+        assert_matches_full_load(planilha, snapshot, 'editada')
+        
+        # Cabeçalhos que o Parquet recusaria repetidos: duas células vazias e 'Obs' duas vezes
+        assert check_extra_headers(['', ''], 'cabeçalhos vazios') == ['Coluna 8', 'Coluna 9']
+        assert check_extra_headers(['Obs', 'Obs'], 'cabeçalhos repetidos') == ['Obs', 'Obs (repetida)']
+    finally:
+        shutil.rmtree(CACHE_CHECK, ignore_errors=True)
+    
+    print("Sincronização incremental: anexadas, fora de ordem, gravação repetida, deltas/compactação, ociosa, arquivadas, editada e "
+          "cabeçalhos vazios/repetidos conferem com a carga completa")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+VERIFICAÇÃO - WEBHOOK E SONDA DE REVISÃO
+Sobe o webhook em uma porta livre sobre um LeadsRefresher com a planilha
+falsa e confere que só a notificação com token sincroniza (uma vez) e que
+a sonda de revisão percebe linhas novas sem webhook
+
+Uso: python benchmarks/check_webhook.py
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Snapshot isolado do cache real (lido na importação de leads_core.config)
+CACHE_CHECK = tempfile.mkdtemp(prefix='leads_check_')
+os.environ['LEADS_CACHE_DIR'] = CACHE_CHECK
+logging.disable(logging.WARNING)
+
+from leads_core.carregador import LeadsRefresher
+from leads_core.webhook import WEBHOOK_CABECALHO_TOKEN, start_webhook_server
+from dados_sinteticos import synthetic_rows, synthetic_sheet
+from fake_sheets import FakeSheetsClient, FakeSpreadsheet
+
+ABA = 'Leads_Todos_Imoveis'
+TOKEN = 'segredo-de-teste'
+# Sonda rápida para a verificação; o teto entre sincronizações fica fora do alcance
+INTERVALO_SONDA = 0.2
+ESPERA_MAX = 10
+
+class CountingRefresher(LeadsRefresher):
+    """LeadsRefresher que conta as sincronizações feitas pela thread de fundo"""
+    
+    sincronizacoes = 0
+    
+    def _refresh(self):
+        self.sincronizacoes += 1
+        return super()._refresh()
+
+def wait_until(condicao, timeout=ESPERA_MAX):
+    """Espera `condicao()` ficar verdadeira; devolve o último resultado"""
+    limite = time.monotonic() + timeout
+    while not condicao() and time.monotonic() < limite:
+        time.sleep(0.05)
+    return condicao()
+
+def post(porta, caminho='/webhook', token=None):
+    """POST no webhook local; devolve o status HTTP"""
+    requisicao = urllib.request.Request(f'http://127.0.0.1:{porta}{caminho}', data=b'{}', method='POST')
+    if token is not None:
+        requisicao.add_header(WEBHOOK_CABECALHO_TOKEN, token)
+    try:
+        with urllib.request.urlopen(requisicao, timeout=5) as resposta:
+            return resposta.status
+    except urllib.error.HTTPError as erro:
+        return erro.code
+
+def main():
+    planilha = FakeSpreadsheet({ABA: synthetic_sheet(500)})
+    try:
+        try:
+            start_webhook_server(0, lambda: None, None)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("webhook subiu sem token")
+        
+        refresher = CountingRefresher(lambda: FakeSheetsClient(planilha), intervalo=3600, intervalo_sonda=INTERVALO_SONDA)
+        assert refresher.wait_first_load(ESPERA_MAX) and refresher.get() is not None, refresher.ultimo_erro
+        assert wait_until(lambda: refresher.sincronizacoes == 1)
+        
+        servidor = start_webhook_server(0, refresher.notify, TOKEN)
+        porta = servidor.server_address[1]
+        assert servidor.server_address[0] == '127.0.0.1', servidor.server_address
+        
+        # Sem token, token errado ou outro caminho: recusado e nenhuma sincronização
+        assert post(porta) == 403
+        assert post(porta, token='errado') == 403
+        assert post(porta, '/outro', TOKEN) == 404
+        time.sleep(INTERVALO_SONDA * 5)
+        assert refresher.sincronizacoes == 1, refresher.sincronizacoes
+        
+        # Com token: uma sincronização, e só uma
+        assert post(porta, token=TOKEN) == 202
+        assert wait_until(lambda: refresher.sincronizacoes == 2), refresher.sincronizacoes
+        time.sleep(INTERVALO_SONDA * 5)
+        assert refresher.sincronizacoes == 2, refresher.sincronizacoes
+        
+        # Linhas novas sem webhook: a sonda vê a revisão mudar e sincroniza uma vez
+        linhas_antes = refresher.get().linhas_planilha
+        planilha.append_rows(ABA, synthetic_rows(10, 3, inicio='2026-01-01', dias=1))
+        assert wait_until(lambda: refresher.get().linhas_planilha == linhas_antes + 10), refresher.get().linhas_planilha
+        time.sleep(INTERVALO_SONDA * 5)
+        assert refresher.sincronizacoes == 3, refresher.sincronizacoes
+        servidor.shutdown()
+    finally:
+        shutil.rmtree(CACHE_CHECK, ignore_errors=True)
+    
+    print(f"Webhook: recusado sem token, 1 sincronização por notificação; sonda: {refresher.sincronizacoes} sincronizações")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+DADOS SINTÉTICOS - LUIS IMÓVEIS
+Linhas brutas no formato da planilha de leads, com os mesmos defeitos que a
+limpeza corrige (nome misturado na data, linhas curtas e linhas vazias)
+"""
+
+import numpy as np
+import pandas as pd
+
+HEADERS = ['Data/Hora', 'Nome', 'Telefone', 'Imóvel/Referência', 'Interesse Visita', 'Status', 'Origem']
+
+REFERENCIAS = (
+    [f'CA{i:03d}' for i in range(300)] + [f'AP{i:03d}' for i in range(500)] +
+    [f'TR{i:02d}' for i in range(50)] + [f'CO{i:02d}' for i in range(80)] +
+    ['Wind Oceanica', 'Tresor Camboinhas', 'Casa na praia', 'Sala comercial',
+     'Loja centro', 'Lançamento Icaraí', 'Apt Niterói', '', 'Cobertura']
+)
+INTERESSES = ['TRUE', 'FALSE', 'sim', 'não', '']
+STATUS = ['Novo', 'Contatado', 'Visitou', 'Proposta', '']
+ORIGENS = ['Site', 'Instagram', 'Facebook', 'Indicação', 'Portal']
+NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Fernanda', 'Gustavo', 'Helena', 'Igor', 'Juliana', 'Lucas']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Costa', 'Almeida', 'Ribeiro']
+
+# Proporções dos defeitos encontrados na planilha real
+TAXA_JOAO_NA_DATA = 0.01      # 'YY-MM-DDTHH:MM:SS João' na data e nome vazio
+TAXA_NOME_ANTES_DATA = 0.005  # 'Maria YY-MM-DDTHH:MM:SS'
+TAXA_LINHA_CURTA = 0.02       # só as 3 primeiras colunas
+TAXA_LINHA_VAZIA = 0.005
+TAXA_REPETIDO = 0.15          # mesmo telefone entrando de novo
+
+def synthetic_rows(linhas, seed=42, inicio='2023-01-01', dias=3 * 365):
+    """Linhas da planilha (listas de strings, sem o cabeçalho), ordenadas por data"""
+    rng = np.random.default_rng(seed)
+    
+    minutos = np.sort(rng.integers(0, dias * 24 * 60, size=linhas))
+    datas = pd.Timestamp(inicio) + pd.to_timedelta(minutos, unit='min') + pd.to_timedelta(rng.integers(0, 60, size=linhas), unit='s')
+    datas = pd.Series(datas)
+    data_br = datas.dt.strftime('%d/%m/%Y %H:%M:%S').to_numpy(dtype=object)
+    data_iso = datas.dt.strftime('%y-%m-%dT%H:%M:%S').to_numpy(dtype=object)
+    
+    nomes = (
+        pd.Series(rng.choice(NOMES, size=linhas)) + ' ' + pd.Series(rng.choice(SOBRENOMES, size=linhas))
+    ).to_numpy(dtype=object)
+    
+    # Telefones com parte repetida (o mesmo lead em contatos diferentes)
+    numeros = 21_900_000_000 + rng.integers(0, 99_999_999, size=linhas)
+    repetidos = rng.random(linhas) < TAXA_REPETIDO
+    numeros[repetidos] = numeros[rng.integers(0, linhas, size=int(repetidos.sum()))]
+    telefones = pd.Series(numeros).astype(str)
+    telefones = ('(' + telefones.str[:2] + ') ' + telefones.str[2:7] + '-' + telefones.str[7:]).to_numpy(dtype=object)
+    
+    colunas = [
+        data_br, nomes, telefones,
+        rng.choice(np.array(REFERENCIAS, dtype=object), size=linhas),
+        rng.choice(np.array(INTERESSES, dtype=object), size=linhas),
+        rng.choice(np.array(STATUS, dtype=object), size=linhas),
+        rng.choice(np.array(ORIGENS, dtype=object), size=linhas),
+    ]
+    rows = np.column_stack(colunas).tolist()
+    
+    # Defeitos conhecidos
+    sorteio = rng.random(linhas)
+    for i in np.flatnonzero(sorteio < TAXA_JOAO_NA_DATA):
+        rows[i][0] = f'{data_iso[i]} João'
+        rows[i][1] = ''
+    limite = TAXA_JOAO_NA_DATA + TAXA_NOME_ANTES_DATA
+    for i in np.flatnonzero((sorteio >= TAXA_JOAO_NA_DATA) & (sorteio < limite)):
+        rows[i][0] = f'Maria {data_iso[i]}'
+    
+    sorteio = rng.random(linhas)
+    for i in np.flatnonzero(sorteio < TAXA_LINHA_CURTA):
+        rows[i] = rows[i][:3]
+    for i in np.flatnonzero(sorteio > 1 - TAXA_LINHA_VAZIA):
+        rows[i] = ['', '', '', '']
+    
+    return rows
+
+def synthetic_sheet(linhas, seed=42, **kwargs):
+    """Valores completos de uma aba: cabeçalho + linhas sintéticas"""
+    return [list(HEADERS)] + synthetic_rows(linhas, seed, **kwargs)
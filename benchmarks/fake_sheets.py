@@ -0,0 +1,110 @@
+"""
+PLANILHA FALSA - LUIS IMÓVEIS
+Substituto local da API do gspread usada pelo dashboard (planilha, abas e
+cliente), para medir o carregamento sem acessar o Google Sheets
+"""
+
+import re
+import time
+
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range
+
+class FakeSpreadsheet:
+    """Planilha em memória: {título da aba: linhas (com cabeçalho)}
+    
+    `latencia` (segundos) simula o custo de uma chamada à API.
+    """
+    
+    def __init__(self, abas, latencia=0.0, revisao='2025-01-01T00:00:00.000Z'):
+        self.abas = abas
+        self.latencia = latencia
+        self.revisao = revisao
+        self.chamadas = []
+    
+    def _chamada(self, nome, *args):
+        self.chamadas.append((nome, *args))
+        if self.latencia:
+            time.sleep(self.latencia)
+    
+    def worksheets(self):
+        return [FakeWorksheet(self, titulo) for titulo in self.abas]
+    
+    def worksheet(self, titulo):
+        if titulo not in self.abas:
+            raise WorksheetNotFound(titulo)
+        return FakeWorksheet(self, titulo)
+    
+    def get_lastUpdateTime(self):
+        self._chamada('get_lastUpdateTime')
+        return self.revisao
+    
+    def append_rows(self, titulo, linhas):
+        """Simula leads novos chegando ao fim de uma aba"""
+        self.abas[titulo].extend(linhas)
+        self.revisao = f'{self.revisao}+{len(linhas)}'
+    
+    def delete_rows(self, titulo, inicio, fim=None):
+        """Remove as linhas `inicio`..`fim` da aba (numeradas como na planilha, cabeçalho = 1)"""
+        del self.abas[titulo][inicio - 1:fim or inicio]
+        self.revisao = f'{self.revisao}-{(fim or inicio) - inicio + 1}'
+    
+    def update_row(self, titulo, linha, valores):
+        """Simula a edição de uma linha já existente (numerada como na planilha)"""
+        self.abas[titulo][linha - 1] = list(valores)
+        self.revisao = f'{self.revisao}~{linha}'
+    
+    def _read_range(self, titulo, intervalo=None):
+        """Valores de um intervalo A1 da aba, cortados como a API faz"""
+        linhas = self.abas[titulo]
+        if not intervalo:
+            return [list(linha) for linha in linhas]
+    
+        grade = a1_range_to_grid_range(intervalo)
+        inicio = grade.get('startRowIndex', 0)
+        fim = grade.get('endRowIndex', len(linhas))
+        col_inicio = grade.get('startColumnIndex', 0)
+        col_fim = grade.get('endColumnIndex')
+        return [list(linha[col_inicio:col_fim]) for linha in linhas[inicio:fim]]
+    
+    def values_batch_get(self, ranges, params=None):
+        self._chamada('values_batch_get', len(ranges))
+        resposta = []
+        for intervalo in ranges:
+            titulo, _, a1 = intervalo.partition('!')
+            titulo = re.sub(r"^'(.*)'$", r'\1', titulo).replace("''", "'")
+            valores = self._read_range(titulo, a1)
+            resposta.append({'range': intervalo, **({'values': valores} if valores else {})})
+        return {'valueRanges': resposta}
+
+class FakeWorksheet:
+    """Aba da planilha falsa, com a interface de leitura do gspread.Worksheet"""
+    
+    def __init__(self, spreadsheet, titulo):
+        self.spreadsheet = spreadsheet
+        self.title = titulo
+    
+    def get_all_values(self):
+        self.spreadsheet._chamada('get_all_values', self.title)
+        return self.spreadsheet._read_range(self.title)
+    
+    def batch_get(self, ranges):
+        self.spreadsheet._chamada('batch_get', self.title, len(ranges))
+        return [self.spreadsheet._read_range(self.title, intervalo) for intervalo in ranges]
+
+class FakeSheetsClient:
+    """Mesma interface do SheetsClient (worksheets/worksheet/invalidate) sobre a planilha falsa"""
+    
+    def __init__(self, spreadsheet, worksheet_names=None):
+        self.spreadsheet = spreadsheet
+        self.worksheet_names = list(worksheet_names or spreadsheet.abas)
+    
+    def worksheets(self):
+        return [aba for aba in self.spreadsheet.worksheets() if aba.title in self.worksheet_names]
+    
+    def worksheet(self):
+        abas = self.worksheets()
+        return abas[0] if abas else None
+    
+    def invalidate(self):
+        pass
@@ -2,6 +2,8 @@
 DASHBOARD STREAMLIT - LUIS IMÓVEIS
 Sistema expandido de análise de leads - VERSÃO CORRIGIDA
 Deploy: Streamlit Cloud
+
+Carga, limpeza e agregações ficam no pacote leads_core; aqui só a interface.
 """
 
 import streamlit as st
@@ -9,12 +11,31 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import gspread
-from google.oauth2.service_account import Credentials
-import json
+import importlib.util
+import io
+import logging
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-import pytz
+
+from leads_core.agregacoes import (
+    HORAS_DIA, best_interest_cell, cube_counts, hour_weekday_histogram, reference_stats, timeline_buckets,
+)
+from leads_core.carregador import LeadsRefresher
+from leads_core.config import (
+    ADMIN_PAINEL, COLUNAS_EXIBIR, METRICS_HOST, METRICS_PORT, PLANILHA_ID, PROBE_INTERVALO, REFERENCIAS_DESTAQUE,
+    TIMEZONE, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_TOKEN, WORKSHEET_NAMES,
+)
+from leads_core.exportacao import FORMATOS_EXPORTACAO, export_bytes
+from leads_core.historico import LeadsHistory
+from leads_core.identidade import lead_identity_stats
+from leads_core.sheets_client import SheetsClient
+from leads_core.tabela import format_leads_for_display, search_leads, sort_leads
+from leads_core.telemetria import TELEMETRIA, span, start_metrics_server, timed
+from leads_core.webhook import start_webhook_server
+
+logger = logging.getLogger(__name__)
 
 # Configuração da página
 st.set_page_config(
@@ -24,243 +45,208 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Configurações
-PLANILHA_ID = "1xtn9-jreUtGPRh_ZQUaeNHq253iztZwXJ8uSmDc2_gc"
-SCOPES = [
-    'https://www.googleapis.com/auth/spreadsheets',
-    'https://www.googleapis.com/auth/drive'
-]
+# Sessões abertas conferem a versão dos dados a cada N segundos (só um fragmento, sem rerun da página)
+SESSAO_VERIFICAR_INTERVALO = 3
+
+# Figuras mantidas em cache
+FIGURAS_CACHE_MAX = 256
+
+# Tamanhos de página da tabela de dados detalhados
+TABELA_TAMANHOS_PAGINA = [25, 50, 100, 250]
+
+# Delta dos cards: rótulo da janela anterior conforme a duração do período selecionado (dias)
+ROTULOS_COMPARACAO = {7: 'semana anterior', **dict.fromkeys(range(28, 32), 'mês anterior')}
+# Semanas exibidas nas coortes por primeiro contato
+COORTES_SEMANAS = 12
+
+# Rótulos dos meses na comparação entre anos
+MESES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+# Rótulos dos dias da semana no mapa de calor de horários (segunda primeiro)
+DIAS_SEMANA = ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom']
+# Leads mínimos de um horário para ele concorrer a "melhor horário" (evita taxas de 1 lead)
+MELHOR_HORARIO_MIN_LEADS = 20
+
+def create_sheets_client():
+    """Cria o cliente Google Sheets a partir das credenciais do Streamlit"""
+    creds_dict = dict(st.secrets['GOOGLE_CREDENTIALS'])
+    return SheetsClient(creds_dict, PLANILHA_ID, WORKSHEET_NAMES)
+
+@st.cache_resource
+def get_refresher():
+    """Refresher único por processo, compartilhado entre todas as sessões"""
+    return LeadsRefresher(create_sheets_client, historico=LeadsHistory())
 
-@st.cache_data(ttl=300)  # Cache por 5 minutos
 def get_data_from_sheets():
-    """Carrega dados da planilha Google - MÉTODO MELHORADO"""
-    try:
-        # Configurar credenciais
-        creds_dict = dict(st.secrets['GOOGLE_CREDENTIALS'])
+    """Retorna o último LeadsDataset válido sem esperar pela rede (None se nunca carregou)"""
+    with span('carregar_dados') as medida:
+        refresher = get_refresher()
+        dataset = refresher.get()
+        # hit: dados já em memória; miss: a página esperou a primeira carga
+        medida['cache'] = 'hit' if dataset is not None else 'miss'
         
-        # Criar credenciais e cliente
-        creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(PLANILHA_ID)
-        
-        # Busca por abas existentes
-        worksheet_names = ['Leads_Todos_Imoveis', 'Leads_Lancamentos', 'Sheet1']
-        worksheet = None
-        
-        for name in worksheet_names:
-            try:
-                worksheet = sheet.worksheet(name)
-                break
-            except:
-                continue
-        
-        if not worksheet:
-            st.error("Nenhuma aba encontrada na planilha")
-            return pd.DataFrame()
-        
-        # CORREÇÃO: Usar get_all_values() ao invés de get_all_records()
-        # para garantir que todas as linhas sejam capturadas
-        all_values = worksheet.get_all_values()
-        
-        if not all_values or len(all_values) < 2:
-            st.warning("Planilha encontrada, mas sem dados suficientes")
-            return pd.DataFrame()
-        
-        # Separar cabeçalho da primeira linha
-        headers = all_values[0]
-        data_rows = all_values[1:]
-        
-        # Filtrar linhas completamente vazias
-        data_rows = [row for row in data_rows if any(cell.strip() for cell in row)]
-        
-        if not data_rows:
-            st.warning("Nenhuma linha de dados encontrada")
-            return pd.DataFrame()
-        
-        # Criar DataFrame garantindo que todas as colunas tenham o mesmo tamanho
-        max_cols = len(headers)
-        processed_rows = []
-        
-        for row_idx, row in enumerate(data_rows):
-            # Preencher colunas faltantes com string vazia
-            while len(row) < max_cols:
-                row.append('')
-            # Truncar se houver colunas extras
-            row = row[:max_cols]
-            
-            # CORREÇÃO ESPECÍFICA: Detectar e corrigir dados misturados na linha
-            if len(row) > 1:  # Verificar se há pelo menos 2 colunas
-                data_hora_col = row[0] if len(row) > 0 else ''
-                nome_col = row[1] if len(row) > 1 else ''
-                
-                # Detectar se há nome misturado na coluna de data
-                if data_hora_col and any(name in str(data_hora_col) for name in ['João', 'Maria', 'Guilherme', 'Teste']):
-                    # Tentar extrair nome da coluna de data
-                    import re
-                    
-                    # Extrair nomes comuns da string de data
-                    names_found = re.findall(r'\b(João|Maria|Guilherme|Teste Sistema|Teste)\b', str(data_hora_col))
-                    if names_found and not nome_col.strip():
-                        # Se nome estava vazio, usar o nome encontrado na data
-                        row[1] = names_found[0]
-                        
-                    # Tentar extrair apenas a parte da data
-                    date_match = re.search(r'(\d{2}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})', str(data_hora_col))
-                    if date_match:
-                        row[0] = date_match.group(1)
-            
-            processed_rows.append(row)
+        if dataset is None:
+            # Processo novo sem snapshot: aguarda a primeira carga
+            refresher.wait_first_load()
+            dataset = refresher.get()
         
-        df = pd.DataFrame(processed_rows, columns=headers)
-        
-        # Remover apenas linhas completamente vazias (mais flexível)
-        # Uma linha é válida se tiver pelo menos Nome OU Telefone preenchido
-        nome_valido = df['Nome'].astype(str).str.strip() != ''
-        telefone_valido = df['Telefone'].astype(str).str.strip() != ''
-        df = df[nome_valido | telefone_valido]
-        
-        if df.empty:
-            st.warning("Nenhum dado válido encontrado após limpeza")
-            return df
-        
-        # Limpeza e processamento da data (mais robusta)
-        def clean_datetime(date_str):
-            """Limpa e converte strings de data malformadas"""
-            if pd.isna(date_str) or date_str == '':
-                return pd.NaT
-                
-            date_str = str(date_str).strip()
-            
-            # Se contém "João" ou outros nomes, extrair apenas a parte da data
-            if any(name in date_str for name in ['João', 'Maria', 'Guilherme']):
-                # Tentar extrair data no formato ISO do início
-                import re
-                iso_match = re.match(r'(\d{2}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})', date_str)
-                if iso_match:
-                    try:
-                        # Converter formato YY-MM-DD para DD/MM/YYYY
-                        iso_date = iso_match.group(1)
-                        parts = iso_date.split('T')
-                        date_part = parts[0]  # YY-MM-DD
-                        time_part = parts[1]  # HH:MM:SS
-                        
-                        year, month, day = date_part.split('-')
-                        # Assumir que YY é 20YY
-                        year = '20' + year if len(year) == 2 else year
-                        
-                        return pd.to_datetime(f"{day}/{month}/{year} {time_part}", 
-                                            format='%d/%m/%Y %H:%M:%S', errors='coerce')
-                    except:
-                        pass
-            
-            # Tentar formato padrão brasileiro
-            try:
-                return pd.to_datetime(date_str, format='%d/%m/%Y %H:%M:%S', errors='coerce')
-            except:
-                # Tentar outros formatos comuns
-                try:
-                    return pd.to_datetime(date_str, errors='coerce')
-                except:
-                    return pd.NaT
-        
-        df['Data/Hora'] = df['Data/Hora'].apply(clean_datetime)
-        
-        # Tratar coluna de interesse (pode vir como TRUE/sim/true/yes)
-        if 'Interesse Visita' in df.columns:
-            df['Interesse_Bool'] = df['Interesse Visita'].astype(str).str.lower().isin(['true', 'sim', 'yes', '1'])
-        else:
-            df['Interesse_Bool'] = False
-        
-        # Identifica tipo do imóvel se não existe a coluna ou está vazia
-        if 'Tipo Imóvel' not in df.columns or df['Tipo Imóvel'].isna().all() or (df['Tipo Imóvel'] == '').all():
-            df['Tipo Imóvel'] = df['Imóvel/Referência'].apply(identify_property_type)
-        
-        # Garantir que Status existe
-        if 'Status' not in df.columns:
-            df['Status'] = 'Novo'
-        
-        st.info(f"✅ Dados carregados: {len(df)} leads encontrados (incluindo linha {len(all_values)-1})")
-        
-        return df
-        
-    except Exception as e:
-        st.error(f"Erro ao carregar dados: {e}")
-        return pd.DataFrame()
-
-def identify_property_type(reference):
-    """Identifica tipo do imóvel pela referência"""
-    if pd.isna(reference) or reference == '':
-        return 'Indefinido'
-    
-    ref = str(reference).upper().strip()
-    
-    if ref.startswith('CA'):
-        return 'Casa'
-    elif ref.startswith('AP'):
-        return 'Apartamento'
-    elif ref.startswith('TR'):
-        return 'Terreno'
-    elif ref.startswith('CO'):
-        return 'Comercial'
-    elif ref in ['WIND OCEANICA', 'TRESOR CAMBOINHAS']:
-        return 'Lançamento'
-    
-    # Busca por palavras-chave
-    if 'CASA' in ref:
-        return 'Casa'
-    elif any(word in ref for word in ['APARTAMENTO', 'APT']):
-        return 'Apartamento'
-    elif 'TERRENO' in ref:
-        return 'Terreno'
-    elif any(word in ref for word in ['COMERCIAL', 'LOJA', 'SALA']):
-        return 'Comercial'
-    elif any(word in ref for word in ['LANÇAMENTO', 'LANCAMENTO']):
-        return 'Lançamento'
-    
-    return 'Outros'
-
-def create_metrics_cards(df):
-    """Cria cards de métricas principais"""
-    if df.empty:
+        if dataset is not None:
+            # Mesmos frames (somente leitura) para todas as sessões: bytes não crescem por sessão
+            medida['linhas'] = dataset.total_linhas
+            medida['bytes'] = dataset.memoria_bytes
+            medida['versao'] = refresher.armazem.versao
+    
+    if dataset is None:
+        st.error(f"Erro ao carregar dados: {refresher.ultimo_erro}")
+    
+    return dataset
+
+def format_delta(atual, anterior, rotulo):
+    """Variação percentual para o delta do st.metric (None sem base de comparação)"""
+    if not anterior:
+        return None
+    return f"{(atual / anterior - 1) * 100:+.0f}% vs {rotulo}"
+
+def previous_period_totals(dataset, periodo, tipo, interesse):
+    """Totais da janela imediatamente anterior ao período, de mesma duração, e o rótulo do delta
+    
+    Somados nos buckets diários (O(dias)); só os leads únicos, que não somam
+    entre dias, são contados nas linhas da janela anterior.
+    """
+    dias = (periodo[1] - periodo[0]).days + 1
+    anterior = (periodo[0] - timedelta(days=dias), periodo[0] - timedelta(days=1))
+    totais = dataset.agregados.window_totals(*anterior, tipo, interesse)
+    totais['Leads_Unicos'] = lead_identity_stats(dataset.indice_leads.view(anterior, tipo, interesse))[0]
+    return totais, ROTULOS_COMPARACAO.get(dias, f"{dias} dias anteriores")
+
+@timed()
+def create_metrics_cards(cubo, referencias, df=None, comparacao=None):
+    """Cria cards de métricas principais
+    
+    Os cards das referências em destaque leem a tabela por referência
+    (build_reference_table) filtrada pelos mesmos critérios do cubo.
+    
+    `comparacao` = (totais da janela anterior, rótulo), de previous_period_totals;
+    cada card do período filtrado ganha o delta contra ela.
+    """
+    if cubo.empty:
         st.warning("Nenhum dado encontrado")
         return
     
-    total_leads = len(df)
-    interesse_leads = df['Interesse_Bool'].sum()
+    total_leads = int(cubo['Leads'].sum())
+    interesse_leads = int(cubo['Com_Interesse'].sum())
     taxa_interesse = (interesse_leads / total_leads * 100) if total_leads > 0 else 0
     
     # Contadores por tipo
-    tipos_count = df['Tipo Imóvel'].value_counts().to_dict()
+    tipos_count = cubo.groupby('Tipo Imóvel', observed=True)['Leads'].sum().to_dict()
+    lancamentos = int(tipos_count.get('Lançamento', 0))
     
     # Lançamentos específicos para compatibilidade
-    wind_count = len(df[df['Imóvel/Referência'] == 'Wind Oceanica'])
-    tresor_count = len(df[df['Imóvel/Referência'] == 'Tresor Camboinhas'])
+    leads_por_ref = cube_counts(referencias, 'Imóvel/Referência', ('Leads',))['Leads']
+    destaques = {referencia: int(leads_por_ref.get(referencia, 0)) for referencia in REFERENCIAS_DESTAQUE}
+    wind_count = destaques['Wind Oceanica']
+    tresor_count = destaques['Tresor Camboinhas']
+    gerais = total_leads - sum(destaques.values())
+    
+    unicos = repetidos = None
+    if df is not None:
+        # Mesma pessoa entrando várias vezes conta uma vez só
+        unicos, repetidos = lead_identity_stats(df)
+    
+    # Deltas contra a janela anterior de mesma duração, calculados sobre os buckets diários
+    deltas = {}
+    if comparacao is not None:
+        anterior, rotulo = comparacao
+        atuais = {
+            'Leads': total_leads, 'Com_Interesse': interesse_leads, 'Lançamentos': lancamentos,
+            'Leads_Unicos': unicos, **destaques,
+        }
+        deltas = {
+            medida: format_delta(valor, anterior[medida], rotulo)
+            for medida, valor in atuais.items() if valor is not None
+        }
+        deltas['Sem_Interesse'] = format_delta(
+            total_leads - interesse_leads, anterior['Leads'] - anterior['Com_Interesse'], rotulo
+        )
+        deltas['Gerais'] = format_delta(
+            gerais, anterior['Leads'] - sum(anterior[referencia] for referencia in REFERENCIAS_DESTAQUE), rotulo
+        )
+        if total_leads and anterior['Leads']:
+            variacao_taxa = taxa_interesse - anterior['Com_Interesse'] / anterior['Leads'] * 100
+            deltas['Taxa'] = f"{variacao_taxa:+.1f} p.p. vs {rotulo}"
     
     # Exibir métricas com mais detalhes
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total de Leads", total_leads)
-        st.metric("Taxa de Interesse", f"{taxa_interesse:.1f}%")
+        st.metric("Total de Leads", total_leads, delta=deltas.get('Leads'))
+        st.metric("Taxa de Interesse", f"{taxa_interesse:.1f}%", delta=deltas.get('Taxa'))
+        if unicos is not None:
+            st.metric("Leads Únicos", unicos, delta=deltas.get('Leads_Unicos'),
+                      help=f"{repetidos} contatos repetidos da mesma pessoa")
     
     with col2:
-        st.metric("Interesse em Visita", interesse_leads)
-        st.metric("Sem Interesse", total_leads - interesse_leads)
+        st.metric("Interesse em Visita", interesse_leads, delta=deltas.get('Com_Interesse'))
+        st.metric("Sem Interesse", total_leads - interesse_leads, delta=deltas.get('Sem_Interesse'), delta_color='inverse')
     
     with col3:
-        st.metric("Lançamentos", tipos_count.get('Lançamento', 0))
-        st.metric("Wind Oceanica", wind_count)
+        st.metric("Lançamentos", lancamentos, delta=deltas.get('Lançamentos'))
+        st.metric("Wind Oceanica", wind_count, delta=deltas.get('Wind Oceanica'))
     
     with col4:
-        st.metric("Tresor Camboinhas", tresor_count)
-        st.metric("Imóveis Gerais", total_leads - wind_count - tresor_count)
+        st.metric("Tresor Camboinhas", tresor_count, delta=deltas.get('Tresor Camboinhas'))
+        st.metric("Imóveis Gerais", gerais, delta=deltas.get('Gerais'))
 
-def create_property_type_chart(df):
-    """Gráfico de distribuição por tipo de imóvel - MELHORADO"""
-    if df.empty:
-        return
+class FigureCache:
+    """Cache LRU das figuras Plotly prontas, compartilhado entre sessões
+    
+    A chave é (versão dos dados, estado dos filtros, id do gráfico): reruns com
+    as mesmas entradas reaproveitam a figura sem reconstruí-la. Guarda o
+    go.Figure, não o dict: com um dict o st.plotly_chart montaria e validaria
+    a figura de novo a cada rerun. As figuras em cache não devem ser alteradas.
+    """
+    
+    def __init__(self, max_itens=FIGURAS_CACHE_MAX):
+        self.max_itens = max_itens
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_build(self, chave, construir):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                TELEMETRIA.cache_event('figuras', True)
+                return self._itens[chave]
+        
+        TELEMETRIA.cache_event('figuras', False)
+        figura = construir()
+        
+        with self._lock:
+            self._itens[chave] = figura
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+        
+        return figura
+
+@st.cache_resource
+def get_figure_cache():
+    """Cache de figuras único por processo"""
+    return FigureCache()
+
+def plot_cached(chave, grafico, construir, *args):
+    """Exibe a figura de `construir(*args)`, construindo-a só se não estiver em cache
     
-    tipos_count = df['Tipo Imóvel'].value_counts()
+    chave identifica os dados e filtros da página; None desativa o cache.
+    """
+    if chave is None:
+        figura = construir(*args)
+    else:
+        figura = get_figure_cache().get_or_build((*chave, grafico), lambda: construir(*args))
+    
+    st.plotly_chart(figura, use_container_width=True)
+
+def build_property_type_figure(cubo):
+    """Figura de distribuição por tipo de imóvel"""
+    tipos_count = cubo.groupby('Tipo Imóvel', observed=True)['Leads'].sum().sort_values(ascending=False)
     
     # Cores personalizadas para cada tipo
     cores_tipos = {
@@ -283,24 +269,18 @@ def create_property_type_chart(df):
     
     fig.update_traces(textposition='inside', textinfo='percent+label')
     fig.update_layout(height=400, showlegend=True)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-def create_interest_analysis(df):
-    """Análise de interesse por tipo - MELHORADO"""
-    if df.empty:
+@timed()
+def create_property_type_chart(cubo, chave=None):
+    """Gráfico de distribuição por tipo de imóvel - MELHORADO"""
+    if cubo.empty:
         return
     
-    interesse_por_tipo = df.groupby('Tipo Imóvel').agg({
-        'Interesse_Bool': ['count', 'sum']
-    }).round(2)
-    
-    interesse_por_tipo.columns = ['Total', 'Com_Interesse']
-    interesse_por_tipo['Taxa_Interesse'] = (
-        interesse_por_tipo['Com_Interesse'] / interesse_por_tipo['Total'] * 100
-    ).round(1)
-    interesse_por_tipo = interesse_por_tipo.reset_index()
-    
-    # Gráfico de barras melhorado
+    plot_cached(chave, 'tipos', build_property_type_figure, cubo)
+
+def build_interest_figure(interesse_por_tipo):
+    """Figura de interesse por tipo de imóvel"""
     fig = px.bar(
         interesse_por_tipo,
         x='Tipo Imóvel',
@@ -312,7 +292,24 @@ def create_interest_analysis(df):
     )
     
     fig.update_layout(height=400, xaxis_tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+@timed()
+def create_interest_analysis(cubo, chave=None):
+    """Análise de interesse por tipo - MELHORADO"""
+    if cubo.empty:
+        return
+    
+    interesse_por_tipo = cube_counts(cubo, 'Tipo Imóvel')
+    
+    interesse_por_tipo.columns = ['Total', 'Com_Interesse']
+    interesse_por_tipo['Taxa_Interesse'] = (
+        interesse_por_tipo['Com_Interesse'] / interesse_por_tipo['Total'] * 100
+    ).round(1)
+    interesse_por_tipo = interesse_por_tipo.reset_index()
+    
+    # Gráfico de barras melhorado
+    plot_cached(chave, 'interesse', build_interest_figure, interesse_por_tipo)
     
     # Tabela de detalhes melhorada
     st.subheader("Detalhes por Tipo")
@@ -336,23 +333,9 @@ def create_interest_analysis(df):
         })
         st.dataframe(styled_df, use_container_width=True)
 
-def create_timeline_chart(df):
-    """Gráfico de evolução temporal - MELHORADO"""
-    if df.empty or df['Data/Hora'].isna().all():
-        return
-    
-    # Agrupa por dia
-    df_daily = df.set_index('Data/Hora').resample('D').agg({
-        'Nome': 'count',
-        'Interesse_Bool': 'sum'
-    }).reset_index()
-    
-    df_daily.columns = ['Data', 'Total_Leads', 'Com_Interesse']
-    df_daily = df_daily[df_daily['Total_Leads'] > 0]  # Remove dias sem leads
-    
-    if df_daily.empty:
-        st.warning("Dados insuficientes para análise temporal")
-        return
+def build_timeline_figure(cubo):
+    """Figura de evolução temporal"""
+    df_daily, rotulo = timeline_buckets(cubo)
     
     # Calcular média móvel
     if len(df_daily) >= 3:
@@ -393,7 +376,7 @@ def create_timeline_chart(df):
                 x=df_daily['Data'],
                 y=df_daily['Media_Movel'],
                 mode='lines',
-                name='Tendência (3 dias)',
+                name=f'Tendência (3 {rotulo})',
                 line=dict(color='#f39c12', width=1, dash='dash'),
                 hovertemplate='<b>%{x}</b><br>Média Móvel: %{y:.1f}<extra></extra>'
             ),
@@ -408,68 +391,61 @@ def create_timeline_chart(df):
         hovermode='x unified'
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-def create_referencia_analysis(df):
-    """Análise das referências mais populares - MELHORADO"""
-    if df.empty:
-        return
-    
-    ref_count = df['Imóvel/Referência'].value_counts().head(10)
-    
-    if ref_count.empty:
-        st.warning("Nenhuma referência encontrada")
+@timed()
+def create_timeline_chart(cubo, chave=None):
+    """Gráfico de evolução temporal - MELHORADO"""
+    if cubo.empty or cubo['Data'].isna().all():
         return
     
-    # Adicionar informação de interesse para cada referência
-    ref_with_interest = []
-    for ref in ref_count.index:
-        total = ref_count[ref]
-        interesse = df[df['Imóvel/Referência'] == ref]['Interesse_Bool'].sum()
-        taxa = (interesse / total * 100) if total > 0 else 0
-        ref_with_interest.append({
-            'Referência': ref,
-            'Total': total,
-            'Com_Interesse': interesse,
-            'Taxa_Interesse': taxa
-        })
-    
-    ref_df = pd.DataFrame(ref_with_interest)
-    
+    plot_cached(chave, 'timeline', build_timeline_figure, cubo)
+
+def build_referencia_figure(ref_df):
+    """Figura das referências mais procuradas"""
     fig = px.bar(
         ref_df,
         x='Total',
         y='Referência',
         orientation='h',
-        title="Top 10 Referências Mais Procuradas",
+        title=f"Top {len(ref_df)} Referências Mais Procuradas",
         color='Taxa_Interesse',
         color_continuous_scale='viridis',
         text='Total',
         hover_data=['Com_Interesse', 'Taxa_Interesse']
     )
     
-    fig.update_layout(height=400)
+    # Altura cresce com o número de barras para manter os rótulos legíveis
+    fig.update_layout(height=max(400, 25 * len(ref_df)), yaxis={'categoryorder': 'total ascending'})
     fig.update_traces(texttemplate='%{text}', textposition='outside')
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-def create_hourly_analysis(df):
-    """Análise por horário - MELHORADO"""
-    if df.empty or df['Data/Hora'].isna().all():
+@timed()
+def create_referencia_analysis(referencias, top_n=10, chave=None):
+    """Análise das referências mais populares - MELHORADO"""
+    if referencias.empty:
         return
     
-    df_hourly = df.copy()
-    df_hourly['Hora'] = df_hourly['Data/Hora'].dt.hour
+    ref_df = reference_stats(referencias, top_n)
     
-    hourly_stats = df_hourly.groupby('Hora').agg({
-        'Nome': 'count',
-        'Interesse_Bool': 'sum'
-    }).reset_index()
+    if ref_df.empty:
+        st.warning("Nenhuma referência encontrada")
+        return
     
-    hourly_stats.columns = ['Hora', 'Total', 'Com_Interesse']
-    hourly_stats['Taxa_Interesse'] = (
-        hourly_stats['Com_Interesse'] / hourly_stats['Total'] * 100
-    ).round(1)
+    plot_cached(chave, f'referencias_{top_n}', build_referencia_figure, ref_df)
     
+    # Mesma tabela do gráfico, para consulta e download
+    with st.expander(f"📋 Tabela das {len(ref_df)} referências"):
+        st.dataframe(ref_df, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="📥 Download CSV das referências",
+            data=ref_df.to_csv(index=False),
+            file_name=f'referencias_luis_imoveis_{datetime.now().strftime("%Y%m%d_%H%M")}.csv',
+            mime='text/csv'
+        )
+
+def build_hourly_figure(hourly_stats):
+    """Figura da distribuição de leads por horário"""
     # Identificar horários de pico
     pico_leads = hourly_stats['Total'].max()
     horarios_pico = hourly_stats[hourly_stats['Total'] == pico_leads]['Hora'].tolist()
@@ -483,16 +459,92 @@ def create_hourly_analysis(df):
     )
     
     fig.update_layout(height=400, xaxis_tickmode='linear')
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def build_weekday_heatmap_figure(histograma):
+    """Mapa de calor de leads por dia da semana x hora, com a taxa de interesse no hover"""
+    taxas = (pd.DataFrame(histograma['Com_Interesse']) / pd.DataFrame(histograma['Leads']) * 100).round(1)
+    
+    fig = go.Figure(go.Heatmap(
+        z=histograma['Leads'],
+        x=list(range(HORAS_DIA)),
+        y=DIAS_SEMANA,
+        customdata=taxas.to_numpy(),
+        colorscale='Blues',
+        hovertemplate="%{y} %{x}h<br>Leads: %{z}<br>Interesse: %{customdata:.1f}%<extra></extra>",
+    ))
+    fig.update_layout(
+        title="Leads por Dia da Semana e Horário",
+        height=350,
+        xaxis=dict(title='Hora', tickmode='linear'),
+        yaxis=dict(autorange='reversed'),
+    )
+    return fig
+
+@timed()
+def create_hourly_analysis(cubo, chave=None):
+    """Análise por horário: curva por hora, mapa de calor dia da semana x hora e melhor horário"""
+    if cubo.empty or cubo['Hora'].isna().all():
+        return
+    
+    # Histograma 7x24 do cubo já filtrado; as horas são a soma dos dias
+    histograma = hour_weekday_histogram(cubo)
+    hourly_stats = pd.DataFrame({
+        'Hora': range(HORAS_DIA),
+        'Total': histograma['Leads'].sum(axis=0),
+        'Com_Interesse': histograma['Com_Interesse'].sum(axis=0),
+    })
+    hourly_stats = hourly_stats[hourly_stats['Total'] > 0]
+    hourly_stats['Taxa_Interesse'] = (
+        hourly_stats['Com_Interesse'] / hourly_stats['Total'] * 100
+    ).round(1)
+    
+    plot_cached(chave, 'horario', build_hourly_figure, hourly_stats)
+    plot_cached(chave, 'horario_semana', build_weekday_heatmap_figure, histograma)
     
-    # Insights dos melhores horários
-    if len(hourly_stats) > 0:
-        melhor_horario = hourly_stats.loc[hourly_stats['Taxa_Interesse'].idxmax()]
-        st.info(f"💡 **Melhor horário para conversão**: {melhor_horario['Hora']}:00h com {melhor_horario['Taxa_Interesse']:.1f}% de interesse")
+    # Insights dos melhores horários (só entre horários com amostra suficiente)
+    melhor = best_interest_cell(hourly_stats['Total'], hourly_stats['Com_Interesse'], MELHOR_HORARIO_MIN_LEADS)
+    if melhor is None:
+        st.caption(f"Nenhum horário com pelo menos {MELHOR_HORARIO_MIN_LEADS} leads no filtro atual para indicar o melhor horário")
+        return
+    
+    # Colunas lidas uma a uma: a linha inteira (iloc) viraria float e a hora sairia "8.0"
+    hora, taxa, total = (hourly_stats[coluna].iloc[melhor] for coluna in ('Hora', 'Taxa_Interesse', 'Total'))
+    insight = f"💡 **Melhor horário para conversão**: {hora:02d}:00h com {taxa:.1f}% de interesse ({total} leads)"
+    celula = best_interest_cell(histograma['Leads'], histograma['Com_Interesse'], MELHOR_HORARIO_MIN_LEADS)
+    if celula is not None:
+        dia, hora = divmod(celula, HORAS_DIA)
+        insight += (
+            f" · melhor combinação: {DIAS_SEMANA[dia]} às {hora:02d}h "
+            f"({histograma['Com_Interesse'][dia, hora] / histograma['Leads'][dia, hora] * 100:.1f}%, "
+            f"{histograma['Leads'][dia, hora]} leads)"
+        )
+    st.info(insight)
 
-def create_advanced_analysis(df):
+def build_origem_figure(cubo):
+    """Figura de distribuição por origem"""
+    origem_stats = cubo.groupby('Origem', observed=True)['Leads'].sum().sort_values(ascending=False)
+    return px.pie(
+        values=origem_stats.values,
+        names=origem_stats.index,
+        title="Distribuição por Origem",
+    )
+
+def build_status_figure(cubo):
+    """Figura de distribuição por status"""
+    status_stats = cubo.groupby('Status', observed=True)['Leads'].sum().sort_values(ascending=False)
+    return px.bar(
+        x=status_stats.index,
+        y=status_stats.values,
+        title="Distribuição por Status",
+        color=status_stats.values,
+        color_continuous_scale='Blues'
+    )
+
+@timed()
+def create_advanced_analysis(cubo, chave=None):
     """Análises avançadas adicionais"""
-    if df.empty:
+    if cubo.empty:
         return
     
     st.subheader("📊 Análises Avançadas")
@@ -501,30 +553,239 @@ def create_advanced_analysis(df):
     
     with col1:
         # Análise de fontes/origem
-        if 'Origem' in df.columns:
-            origem_stats = df['Origem'].value_counts()
-            fig_origem = px.pie(
-                values=origem_stats.values,
-                names=origem_stats.index,
-                title="Distribuição por Origem",
-            )
-            st.plotly_chart(fig_origem, use_container_width=True)
+        if 'Origem' in cubo.columns:
+            plot_cached(chave, 'origem', build_origem_figure, cubo)
     
     with col2:
         # Análise de status
-        if 'Status' in df.columns:
-            status_stats = df['Status'].value_counts()
-            fig_status = px.bar(
-                x=status_stats.index,
-                y=status_stats.values,
-                title="Distribuição por Status",
-                color=status_stats.values,
-                color_continuous_scale='Blues'
+        if 'Status' in cubo.columns:
+            plot_cached(chave, 'status', build_status_figure, cubo)
+
+def build_year_comparison_figure(comparacao):
+    """Figura de leads por mês, uma linha por ano, com total e variação anual na legenda"""
+    fig = go.Figure()
+    totais = comparacao.groupby('Ano')['Leads'].sum()
+    
+    for ano, dados in comparacao.groupby('Ano'):
+        anterior = totais.get(ano - 1)
+        variacao = f", {(totais[ano] / anterior - 1) * 100:+.0f}% vs {ano - 1}" if anterior else ""
+        fig.add_trace(
+            go.Scatter(
+                x=[MESES[mes - 1] for mes in dados['Mês']],
+                y=dados['Leads'],
+                mode='lines+markers',
+                name=f"{ano} ({totais[ano]} leads{variacao})",
+                hovertemplate=f'<b>%{{x}}/{ano}</b><br>Leads: %{{y}}<extra></extra>'
             )
-            st.plotly_chart(fig_status, use_container_width=True)
+        )
+    
+    fig.update_xaxes(title_text="Mês", categoryorder='array', categoryarray=MESES)
+    fig.update_yaxes(title_text="Número de Leads")
+    fig.update_layout(title_text="Leads por Mês em Cada Ano (histórico completo)", height=400, hovermode='x unified')
+    
+    return fig
+
+def build_cohort_figure(coortes):
+    """Figura das coortes: distribuição do status atual dos leads de cada semana de primeiro contato"""
+    totais = coortes.sum(axis=1)
+    percentuais = coortes.div(totais, axis=0) * 100
+    semanas = [f"{semana:%d/%m}" for semana in coortes.index]
+    
+    fig = go.Figure()
+    for status in coortes.columns:
+        fig.add_trace(
+            go.Bar(
+                x=semanas,
+                y=percentuais[status],
+                name=str(status),
+                customdata=coortes[status],
+                hovertemplate='<b>Semana de %{x}</b><br>%{y:.1f}% (%{customdata} leads)<extra>' + str(status) + '</extra>'
+            )
+        )
+    
+    fig.update_xaxes(title_text="Semana do primeiro contato")
+    fig.update_yaxes(title_text="% dos leads da coorte", range=[0, 100])
+    fig.update_layout(barmode='stack', title_text="Status Atual por Coorte de Primeiro Contato", height=400)
+    
+    return fig
+
+@timed()
+def create_cohort_analysis(agregados, chave=None):
+    """Coortes semanais por primeiro contato x status atual (mantidas incrementalmente)"""
+    if agregados is None:
+        return
+    
+    coortes = agregados.cohorts(COORTES_SEMANAS)
+    if coortes.empty:
+        return
+    
+    st.subheader("🧭 Coortes por Semana do Primeiro Contato")
+    plot_cached(chave, 'coortes', build_cohort_figure, coortes)
+
+@timed()
+def create_year_comparison(historico, tipo, interesse, chave=None):
+    """Comparação entre anos, consultada no histórico local (não nos leads em memória)"""
+    if historico is None:
+        return
+    
+    def construir():
+        # Agregação feita no SQLite; só roda quando a figura não está em cache
+        return build_year_comparison_figure(historico.year_comparison(tipo, interesse))
+    
+    st.subheader("📅 Comparação entre Anos")
+    try:
+        # MIN/MAX pelo índice de data/hora: não varre a tabela
+        if historico.date_range()[0] is None:
+            st.info("Histórico local ainda vazio: é preenchido a cada sincronização com a planilha")
+            return
+        plot_cached(chave, 'comparacao_anos', construir)
+    except Exception as e:
+        logger.warning("Histórico indisponível: %s", e)
+        st.info("Histórico local indisponível no momento")
+
+@timed()
+def create_leads_table(df, total_linhas, df_completo=None):
+    """Tabela paginada: busca, ordenação e formatação só da página exibida"""
+    col_busca, col_ordem, col_sentido, col_tamanho = st.columns([3, 2, 1, 1])
+    
+    with col_busca:
+        termo = st.text_input("Buscar (nome, telefone ou referência):", key='tabela_busca')
+    with col_ordem:
+        colunas_ordenaveis = [col for col in COLUNAS_EXIBIR if col in df.columns]
+        ordenar_por = st.selectbox("Ordenar por:", colunas_ordenaveis, key='tabela_ordem')
+    with col_sentido:
+        sentido = st.selectbox("Ordem:", ["Decrescente", "Crescente"], key='tabela_sentido')
+    with col_tamanho:
+        tamanho = st.selectbox("Linhas:", TABELA_TAMANHOS_PAGINA, index=1, key='tabela_tamanho')
+    
+    resultado = sort_leads(search_leads(df, termo), ordenar_por, sentido == "Crescente")
+    
+    if resultado.empty:
+        st.warning("Nenhum registro encontrado para a busca")
+        return
+    
+    paginas = (len(resultado) - 1) // tamanho + 1
+    # Sem key: o widget volta para a página 1 quando o número de páginas muda
+    pagina = st.number_input(f"Página (de {paginas}):", min_value=1, max_value=paginas, value=1)
+    inicio = (pagina - 1) * tamanho
+    fim = min(inicio + tamanho, len(resultado))
+    
+    # Mostrar número total de registros
+    st.info(f"📊 Mostrando {inicio + 1}–{fim} de {len(resultado)} registros ({total_linhas} total)")
+    
+    st.dataframe(
+        format_leads_for_display(resultado.iloc[inicio:fim]),
+        use_container_width=True, height=400, hide_index=True
+    )
+    
+    # Arquivos gerados só quando o download é de fato solicitado, gravados em lotes
+    # (`data` como função exige streamlit>=1.52; versões anteriores recusam o callable)
+    exportar_tudo = st.checkbox(
+        "Exportar histórico completo (ignora filtros e busca)",
+        key='tabela_exportar_tudo', disabled=df_completo is None
+    )
+    df_exportar = df_completo if exportar_tudo and df_completo is not None else resultado
+    
+    sufixo = datetime.now().strftime("%Y%m%d_%H%M")
+    col_csv, col_gzip, col_parquet, col_xlsx = st.columns(4)
+    botoes = [(col_csv, 'csv', "📥 Download CSV"), (col_gzip, 'csv.gz', "📥 Download CSV (gzip)"),
+              (col_parquet, 'parquet', "📥 Download Parquet")]
+    
+    for coluna, formato, rotulo in botoes:
+        extensao, mime = FORMATOS_EXPORTACAO[formato]
+        with coluna:
+            st.download_button(
+                label=rotulo,
+                data=lambda formato=formato: export_bytes(df_exportar, formato, COLUNAS_EXIBIR),
+                file_name=f'leads_luis_imoveis_{sufixo}{extensao}',
+                mime=mime
+            )
+    
+    with col_xlsx:
+        # XLSX depende do openpyxl (opcional)
+        if importlib.util.find_spec('openpyxl') is not None:
+            def gerar_xlsx():
+                buffer = io.BytesIO()
+                format_leads_for_display(df_exportar).to_excel(buffer, index=False)
+                return buffer.getvalue()
+            
+            st.download_button(
+                label="📥 Download XLSX",
+                data=gerar_xlsx,
+                file_name=f'leads_luis_imoveis_{sufixo}.xlsx',
+                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """Endpoint /metrics (Prometheus) único por processo, se LEADS_METRICS_PORT estiver definida"""
+    if not METRICS_PORT:
+        return None
+    
+    try:
+        return start_metrics_server(METRICS_PORT, host=METRICS_HOST)
+    except OSError as e:
+        # Porta ocupada (ex.: outro worker já serve as métricas)
+        logger.warning("Endpoint de métricas indisponível na porta %d: %s", METRICS_PORT, e)
+        return None
+
+@st.cache_resource
+def start_webhook_endpoint():
+    """Webhook de alterações único por processo, se LEADS_WEBHOOK_PORT estiver definida"""
+    if not WEBHOOK_PORT:
+        return None
+    if not WEBHOOK_TOKEN:
+        # Sem token qualquer um poderia forçar leituras da planilha
+        logger.error("Webhook não iniciado: LEADS_WEBHOOK_PORT definida sem LEADS_WEBHOOK_TOKEN")
+        return None
+    
+    try:
+        return start_webhook_server(WEBHOOK_PORT, get_refresher().notify, WEBHOOK_TOKEN, WEBHOOK_HOST)
+    except OSError as e:
+        # Porta ocupada (ex.: outro worker já recebe o webhook)
+        logger.warning("Webhook indisponível na porta %d: %s", WEBHOOK_PORT, e)
+        return None
+
+@st.fragment(run_every=SESSAO_VERIFICAR_INTERVALO)
+def watch_for_updates(versao_exibida):
+    """Recarrega a página quando o refresher publica dados novos (sem o usuário interagir)"""
+    dataset = get_refresher().get()
+    if dataset is not None and dataset.versao != versao_exibida:
+        st.rerun(scope='app')
+
+def admin_mode():
+    """Painel de admin ligado só por LEADS_ADMIN=1 no servidor (a URL não liga o painel para ninguém)"""
+    return ADMIN_PAINEL
+
+def create_telemetry_panel():
+    """Painel de tempos na sidebar: p50/p95 por etapa, cache e último volume medido"""
+    with st.sidebar.expander("⏱️ Desempenho (admin)"):
+        resumo = pd.DataFrame(TELEMETRIA.summary())
+        if resumo.empty:
+            st.caption("Nenhuma medição ainda")
+            return
+        
+        resumo['ultimo'] = resumo['ultimo'].map(
+            lambda atributos: ', '.join(f"{chave}={valor}" for chave, valor in atributos.items())
+        )
+        st.dataframe(resumo.sort_values('p95_ms', ascending=False), use_container_width=True, hide_index=True)
+        if METRICS_PORT:
+            st.caption(f"Prometheus: {METRICS_HOST}:{METRICS_PORT}, caminho /metrics")
 
 def main():
     """Função principal do dashboard"""
+    start_metrics_endpoint()
+    start_webhook_endpoint()
+    
+    # Tempo total do rerun (o p95 é acompanhado pelo painel de admin e pelo /metrics)
+    with span('rerun'):
+        render_dashboard()
+    
+    if admin_mode():
+        create_telemetry_panel()
+
+def render_dashboard():
+    """Monta a página: filtros, métricas, gráficos e tabela"""
     
     # Header melhorado
     st.title("🏠 Dashboard Luis Imóveis")
@@ -535,20 +796,24 @@ def main():
     
     # Carrega dados
     with st.spinner("Carregando dados da planilha..."):
-        df = get_data_from_sheets()
+        dataset = get_data_from_sheets()
     
-    if df.empty:
+    if dataset is None or dataset.empty:
         st.error("Não foi possível carregar os dados da planilha")
         st.stop()
     
+    # Leads novos aparecem sozinhos nas sessões abertas
+    watch_for_updates(dataset.versao)
+    
     # Filtros na sidebar
-    tipos_disponiveis = ['Todos'] + list(df['Tipo Imóvel'].unique())
+    tipos_disponiveis = ['Todos'] + list(dataset.cubo['Tipo Imóvel'].unique())
     tipo_selecionado = st.sidebar.selectbox("Filtrar por Tipo:", tipos_disponiveis)
     
     # Filtro de período
-    if not df['Data/Hora'].isna().all():
-        data_min = df['Data/Hora'].min().date()
-        data_max = df['Data/Hora'].max().date()
+    periodo_filtro = None
+    if not dataset.cubo['Data'].isna().all():
+        data_min = dataset.cubo['Data'].min().date()
+        data_max = dataset.cubo['Data'].max().date()
         
         # Calcular período padrão baseado nos dados disponíveis
         periodo_padrao_inicio = max(data_min, data_max - timedelta(days=30))
@@ -560,10 +825,9 @@ def main():
             max_value=data_max
         )
         
-        # Aplicar filtro de período
+        # Durante a seleção o widget devolve só a data inicial
         if len(periodo) == 2:
-            mask = (df['Data/Hora'].dt.date >= periodo[0]) & (df['Data/Hora'].dt.date <= periodo[1])
-            df = df[mask]
+            periodo_filtro = periodo
     
     # Filtro de interesse
     filtro_interesse = st.sidebar.radio(
@@ -571,79 +835,71 @@ def main():
         ["Todos", "Apenas com interesse", "Apenas sem interesse"]
     )
     
-    if filtro_interesse == "Apenas com interesse":
-        df = df[df['Interesse_Bool'] == True]
-    elif filtro_interesse == "Apenas sem interesse":
-        df = df[df['Interesse_Bool'] == False]
+    # Quantidade de referências no ranking
+    top_referencias = st.sidebar.slider("Top referências:", min_value=10, max_value=500, value=10, step=10)
     
-    # Aplicar filtro de tipo
-    if tipo_selecionado != 'Todos':
-        df = df[df['Tipo Imóvel'] == tipo_selecionado]
+    # Aplicar filtros (gráficos leem apenas a fatia filtrada do cubo de agregados)
+    df, cubo, referencias = dataset.filter(periodo_filtro, tipo_selecionado, filtro_interesse)
+    
+    # Chave do cache de figuras: versão dos dados + estado dos filtros
+    chave = (dataset.versao, periodo_filtro, tipo_selecionado, filtro_interesse)
     
     # Status do sistema
     st.success(f"✅ Sistema funcionando - {len(df)} leads encontrados")
     
-    # Cards de métricas
-    create_metrics_cards(df)
+    # Cards de métricas: período selecionado contra a janela anterior de mesma duração
+    # (7 dias = semana anterior, 28 a 31 dias = mês anterior)
+    comparacao = None
+    if periodo_filtro is not None:
+        comparacao = previous_period_totals(dataset, periodo_filtro, tipo_selecionado, filtro_interesse)
+    create_metrics_cards(cubo, referencias, df, comparacao)
     
     # Layout em colunas
     col1, col2 = st.columns(2)
     
     with col1:
-        create_property_type_chart(df)
-        create_timeline_chart(df)
+        create_property_type_chart(cubo, chave)
+        create_timeline_chart(cubo, chave)
     
     with col2:
-        create_interest_analysis(df)
-        create_referencia_analysis(df)
+        create_interest_analysis(cubo, chave)
+        create_referencia_analysis(referencias, top_referencias, chave)
     
     # Análise horária
     st.subheader("⏰ Análise por Horário")
-    create_hourly_analysis(df)
+    create_hourly_analysis(cubo, chave)
     
     # Análises avançadas
-    create_advanced_analysis(df)
+    create_advanced_analysis(cubo, chave)
+    
+    # Coortes (independem dos filtros da sidebar)
+    create_cohort_analysis(dataset.agregados, (dataset.versao, None, 'Todos', 'Todos'))
+    
+    # Comparação entre anos (histórico local; o período da sidebar não se aplica)
+    create_year_comparison(
+        get_refresher().historico, tipo_selecionado, filtro_interesse,
+        (dataset.versao, None, tipo_selecionado, filtro_interesse)
+    )
     
     # Tabela de dados
     st.subheader("📋 Dados Detalhados")
     
     if not df.empty:
-        # Preparar dados para exibição
-        colunas_exibir = [
-            'Data/Hora', 'Nome', 'Telefone', 'Imóvel/Referência',
-            'Interesse Visita', 'Tipo Imóvel', 'Status'
-        ]
-        
-        # Verificar quais colunas existem
-        colunas_disponiveis = [col for col in colunas_exibir if col in df.columns]
-        df_display = df[colunas_disponiveis].copy()
-        
-        # Formatar data
-        if 'Data/Hora' in df_display.columns and not df_display['Data/Hora'].isna().all():
-            df_display['Data/Hora'] = df_display['Data/Hora'].dt.strftime('%d/%m/%Y %H:%M')
-        
-        # Mostrar número total de registros
-        st.info(f"📊 Mostrando {len(df_display)} registros de {len(get_data_from_sheets())} total")
-        
-        st.dataframe(df_display, use_container_width=True, height=400)
-        
-        # Botão de download
-        csv = df_display.to_csv(index=False)
-        st.download_button(
-            label="📥 Download CSV",
-            data=csv,
-            file_name=f'leads_luis_imoveis_{datetime.now().strftime("%Y%m%d_%H%M")}.csv',
-            mime='text/csv'
-        )
+        create_leads_table(df, dataset.total_linhas, dataset.df)
     
     # Footer com informações
+    refresher = get_refresher()
+    
     st.markdown("---")
     st.markdown(
         f"**Sistema Expandido v2.1** | "
-        f"Última atualização: {datetime.now(pytz.timezone('America/Sao_Paulo')).strftime('%d/%m/%Y %H:%M:%S')} | "
-        f"Dados em tempo real da planilha Google | "
-        f"🔄 Cache de 5 minutos"
+        f"Dados de: {dataset.atualizado_em.astimezone(TIMEZONE).strftime('%d/%m/%Y %H:%M:%S')} | "
+        f"Planilha Google (abas {dataset.aba or '?'}, {dataset.linhas_planilha} linhas) | "
+        f"🔄 Alterações da planilha verificadas a cada {PROBE_INTERVALO:g} segundos"
     )
+    
+    if refresher.ultimo_erro is not None:
+        st.caption(f"⚠️ Última tentativa de atualização falhou: {refresher.ultimo_erro}")
 
 if __name__ == "__main__":
     main()
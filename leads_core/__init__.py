@@ -0,0 +1,58 @@
+"""
+NÚCLEO DE LEADS - LUIS IMÓVEIS
+Carga, limpeza, classificação e agregação dos leads, sem dependência do Streamlit
+
+Os submódulos são importados sob demanda: `import leads_core` não carrega
+pandas, pyarrow nem gspread até que um nome seja usado.
+"""
+
+import importlib
+
+# nome público -> submódulo que o define
+_EXPORTS = {
+    'config': [
+        'CACHE_DIR', 'COLUNAS_CATEGORICAS', 'COLUNAS_EXIBIR', 'CUBO_DIMENSOES',
+        'PLANILHA_ID', 'REFERENCIAS_DIMENSOES', 'REFRESH_INTERVALO', 'SNAPSHOT_PATH', 'TIMEZONE',
+        'WORKSHEET_NAMES',
+    ],
+    'limpeza': [
+        'LeadKeyIndex', 'align_categories', 'apply_schema', 'clean_datetime', 'clean_leads', 'clean_tab',
+        'concat_leads', 'deduplicate_leads', 'merge_leads', 'normalize_phone',
+    ],
+    'esquema': ['SchemaError', 'normalize_header', 'normalize_headers', 'resolve_schema'],
+    'classificador': ['classify_property_types', 'identify_property_type', 'load_property_rules'],
+    'identidade': [
+        'LeadIdentityIndex', 'assign_lead_ids', 'lead_identity_stats', 'mark_first_contacts',
+        'fallback_names', 'name_identity', 'phone_identity',
+    ],
+    'agregacoes': [
+        'LeadsDataset', 'LeadsFilterIndex', 'best_interest_cell', 'build_cube', 'build_reference_table',
+        'cube_counts', 'hour_weekday_histogram', 'reference_stats', 'timeline_buckets',
+    ],
+    'carregador': [
+        'LeadsRefresher', 'fetch_ranges', 'get_sheet_revision', 'load_snapshot', 'refresh_snapshot',
+        'save_snapshot', 'sync_leads',
+    ],
+    'armazem': ['LeadsStore', 'LeadsView', 'freeze_frame'],
+    'historico': ['LeadsHistory'],
+    'comparacoes': ['RollingAggregates'],
+    'tabela': ['format_leads_for_display', 'search_leads', 'sort_leads'],
+    'exportacao': ['FORMATOS_EXPORTACAO', 'export_bytes', 'export_leads', 'export_to_tempfile'],
+    'telemetria': ['TELEMETRIA', 'span', 'start_metrics_server', 'timed'],
+    'webhook': ['start_webhook_server'],
+    'sheets_client': ['SheetsClient'],
+}
+_ORIGEM = {nome: modulo for modulo, nomes in _EXPORTS.items() for nome in nomes}
+
+__all__ = sorted(_ORIGEM)
+
+def __getattr__(nome):
+    modulo = _ORIGEM.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f'.{modulo}', __name__), nome)
+    globals()[nome] = valor
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,372 @@
+"""
+AGREGAÇÕES DE LEADS - LUIS IMÓVEIS
+Cubo de agregados, tabela por referência, índices dos filtros e o LeadsDataset
+compartilhado pela página
+"""
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .armazem import LeadsView, freeze_frame
+from .comparacoes import RollingAggregates
+from .config import CUBO_DIMENSOES, REFERENCIAS_DIMENSOES, TIMELINE_MAX_PONTOS, TIMEZONE
+from .limpeza import merge_leads
+from .telemetria import span
+
+# Células do histograma de horários: 7 dias da semana x 24 horas
+DIAS_SEMANA_TOTAL = 7
+HORAS_DIA = 24
+
+def _count_leads(df, chaves):
+    """Leads, primeiros contatos e leads com interesse por combinação das chaves
+    
+    `chaves` é um dict {coluna do resultado: Series alinhada com df} e precisa
+    incluir Interesse_Bool.
+    """
+    base = pd.DataFrame(chaves)
+    base['Primeiros_Contatos'] = df['Primeiro_Contato'] if 'Primeiro_Contato' in df.columns else True
+    
+    contagens = (
+        base.groupby(list(chaves), dropna=False, sort=False, observed=True)['Primeiros_Contatos']
+        .agg(['size', 'sum'])
+        .rename(columns={'size': 'Leads', 'sum': 'Primeiros_Contatos'})
+        .reset_index()
+    )
+    contagens['Primeiros_Contatos'] = contagens['Primeiros_Contatos'].astype('int64')
+    contagens['Com_Interesse'] = contagens['Leads'].where(contagens['Interesse_Bool'], 0)
+    return contagens
+
+def build_cube(df):
+    """Pré-agrega os leads por (data, hora, tipo, origem, status, interesse)
+    
+    Construído uma vez por atualização dos dados; gráficos e filtros da página
+    trabalham só sobre o cubo. O número de linhas é limitado por dias x 24
+    horas x combinações das dimensões de baixa cardinalidade: com poucos leads
+    por hora ele fica perto de uma linha por lead, e só comprime quando vários
+    leads caem na mesma célula. A referência (centenas de valores) fica fora,
+    na tabela de build_reference_table, para não multiplicar essas células.
+    """
+    if df.empty:
+        return pd.DataFrame()
+    
+    chaves = {
+        'Data': df['Data/Hora'].dt.normalize(),
+        'Hora': df['Data/Hora'].dt.hour.astype('Int64'),
+    }
+    for col in CUBO_DIMENSOES:
+        if col in df.columns:
+            chaves[col] = df[col]
+    
+    cubo = _count_leads(df, chaves)
+    # Dia da semana x hora codificados em um inteiro (segunda 0h = 0 ... domingo 23h = 167; -1 sem data)
+    hora_semana = cubo['Data'].dt.weekday * HORAS_DIA + cubo['Hora'].astype('float64')
+    cubo['Hora_Semana'] = hora_semana.fillna(-1).astype('int16')
+    
+    return cubo
+
+def build_reference_table(df):
+    """Leads por (data, referência, tipo, interesse), para o ranking e os cards de referência
+    
+    Sem hora, origem nem status: como o tipo costuma seguir a referência, o
+    tamanho fica limitado por dias x referências procuradas no dia x 2 (com e
+    sem interesse).
+    """
+    if df.empty:
+        return pd.DataFrame()
+    
+    chaves = {'Data': df['Data/Hora'].dt.normalize()}
+    for col in REFERENCIAS_DIMENSOES:
+        if col in df.columns:
+            chaves[col] = df[col]
+    
+    return _count_leads(df, chaves)
+
+def cube_counts(cubo, coluna, medidas=('Leads', 'Com_Interesse')):
+    """Total e leads com interesse (ou outras medidas) por valor de uma dimensão do cubo"""
+    return cubo.groupby(coluna, observed=True)[list(medidas)].sum()
+
+def hour_weekday_histogram(cubo, medidas=('Leads', 'Com_Interesse')):
+    """Matrizes 7x24 (dia da semana x hora) de cada medida do cubo, somadas com np.bincount
+    
+    Usa o código Hora_Semana calculado na montagem do cubo: o cubo já filtrado
+    pela página vira o histograma sem groupby nem cópia das linhas.
+    """
+    if cubo.empty:
+        return {medida: np.zeros((DIAS_SEMANA_TOTAL, HORAS_DIA), dtype=np.int64) for medida in medidas}
+    
+    codigos = cubo['Hora_Semana'].to_numpy()
+    com_data = codigos >= 0
+    return {
+        medida: np.bincount(
+            codigos[com_data], weights=cubo[medida].to_numpy()[com_data], minlength=DIAS_SEMANA_TOTAL * HORAS_DIA
+        ).astype(np.int64).reshape(DIAS_SEMANA_TOTAL, HORAS_DIA)
+        for medida in medidas
+    }
+
+class LeadsFilterIndex:
+    """Índices dos filtros da sidebar sobre um frame ordenado por data
+    
+    O período vira um intervalo contíguo resolvido com searchsorted; tipo e
+    interesse usam máscaras booleanas pré-calculadas. Cada consulta aplica
+    uma única máscara combinada sobre a fatia do período. O frame ordenado
+    fica somente leitura e é compartilhado por todas as consultas.
+    `ordenado=True` indica que df já está nessa ordem (sem cópia nem sort).
+    """
+    
+    def __init__(self, df, coluna_data, nome='leads', ordenado=False):
+        self.nome = nome  # prefixo dos spans de telemetria
+        self.coluna_data = coluna_data
+        # Frame ordenado por data, com as datas vazias (NaT) no final
+        if not ordenado:
+            df = df.sort_values(coluna_data, kind='stable', na_position='last', ignore_index=True)
+        self.df = freeze_frame(df)
+        
+        datas = self.df[coluna_data]
+        self._datas = pd.DatetimeIndex(datas[datas.notna()])
+        self._interesse = self.df['Interesse_Bool'].to_numpy(dtype=bool)
+        self._por_tipo = {
+            tipo: (self.df['Tipo Imóvel'] == tipo).to_numpy(dtype=bool)
+            for tipo in self.df['Tipo Imóvel'].unique()
+        }
+    
+    def extended(self, novos):
+        """Índice com as linhas de `novos` intercaladas por data nas atuais, sem ordenar tudo de novo
+        
+        Cada linha nova com data entra logo depois das atuais de mesma data
+        (a mesma ordem do sort estável do frame inteiro); as sem data vão para
+        o final. As linhas atuais antes da primeira posição alterada não mudam
+        de lugar: só a cauda é reordenada, e o frame é copiado uma vez.
+        """
+        novos = novos.sort_values(self.coluna_data, kind='stable', na_position='last', ignore_index=True)
+        com_data = int(novos[self.coluna_data].notna().sum())
+        indexadas, atuais = len(self._datas), len(self.df)
+        
+        # Posições no frame [atuais com data + novas com data]: cada nova vai após as atuais até a data dela
+        destinos = self._datas.searchsorted(pd.DatetimeIndex(novos[self.coluna_data].iloc[:com_data]), side='right')
+        destinos += np.arange(com_data)
+        ordem = np.empty(indexadas + com_data, dtype=np.int64)
+        de_novos = np.zeros(indexadas + com_data, dtype=bool)
+        de_novos[destinos] = True
+        ordem[~de_novos] = np.arange(indexadas)
+        ordem[de_novos] = atuais + np.arange(com_data)
+        # Depois as sem data: as atuais (já no final do frame) e as novas
+        ordem = np.concatenate([ordem, np.arange(indexadas, atuais), atuais + np.arange(com_data, len(novos))])
+        
+        # Leads novos costumam ser recentes: a cauda a reordenar é curta
+        inicio = int(destinos[0]) if com_data else indexadas
+        cauda = merge_leads([self.df.iloc[inicio:], novos]).take(ordem[inicio:] - inicio)
+        df = merge_leads([self.df.iloc[:inicio], cauda])
+        return LeadsFilterIndex(df, self.coluna_data, self.nome, ordenado=True)
+    
+    def _date_range(self, periodo):
+        """Posições [inicio, fim) das linhas dentro do período (datas inclusivas)"""
+        if periodo is None:
+            return 0, len(self.df)
+        
+        inicio = pd.Timestamp(periodo[0], tz=TIMEZONE)
+        fim = pd.Timestamp(periodo[1] + timedelta(days=1), tz=TIMEZONE)
+        return (
+            self._datas.searchsorted(inicio, side='left'),
+            self._datas.searchsorted(fim, side='left'),
+        )
+    
+    def select(self, periodo=None, tipo='Todos', interesse='Todos'):
+        """Intervalo [inicio, fim) do período e máscara dos demais filtros sobre ele (None = todas)"""
+        with span(f'filtro.{self.nome}.periodo'):
+            inicio, fim = self._date_range(periodo)
+            mask = np.ones(fim - inicio, dtype=bool)
+        
+        if tipo != 'Todos':
+            with span(f'filtro.{self.nome}.tipo'):
+                por_tipo = self._por_tipo.get(tipo)
+                mask &= por_tipo[inicio:fim] if por_tipo is not None else False
+        
+        if interesse != 'Todos':
+            with span(f'filtro.{self.nome}.interesse'):
+                if interesse == "Apenas com interesse":
+                    mask &= self._interesse[inicio:fim]
+                elif interesse == "Apenas sem interesse":
+                    mask &= ~self._interesse[inicio:fim]
+        
+        return inicio, fim, None if mask.all() else mask
+    
+    def query(self, periodo=None, tipo='Todos', interesse='Todos'):
+        """Retorna as linhas que atendem aos filtros (DataFrame)"""
+        inicio, fim, mask = self.select(periodo, tipo, interesse)
+        with span(f'filtro.{self.nome}.aplicar') as medida:
+            fatia = self.df.iloc[inicio:fim]
+            resultado = fatia if mask is None else fatia[mask]
+            medida['linhas'] = len(resultado)
+        return resultado
+    
+    def view(self, periodo=None, tipo='Todos', interesse='Todos'):
+        """Retorna as linhas que atendem aos filtros como LeadsView (só posições, sem cópia)"""
+        inicio, fim, mask = self.select(periodo, tipo, interesse)
+        with span(f'filtro.{self.nome}.aplicar') as medida:
+            posicoes = slice(inicio, fim) if mask is None else np.flatnonzero(mask) + inicio
+            resultado = LeadsView(self.df, posicoes)
+            medida['linhas'] = len(resultado)
+        return resultado
+
+@dataclass(frozen=True)
+class LeadsDataset:
+    """Resultado imutável de um carregamento: leads, cubo, referências e metadados da origem
+    
+    Uma única instância por processo é compartilhada por todas as sessões
+    (ver LeadsStore), com os frames somente leitura; as visões filtradas
+    saem dela sem copiar os leads nem chamar o carregador de novo.
+    """
+    df: pd.DataFrame
+    cubo: pd.DataFrame
+    total_linhas: int
+    atualizado_em: datetime
+    indice_leads: LeadsFilterIndex
+    indice_cubo: LeadsFilterIndex
+    referencias: pd.DataFrame
+    indice_referencias: LeadsFilterIndex
+    versao: str
+    aba: str = None
+    revisao: str = None
+    linhas_planilha: int = 0
+    agregados: RollingAggregates = None
+    memoria_bytes: int = 0  # memória dos leads (schema compacto), medida antes de congelar o frame
+    
+    @staticmethod
+    def version_of(snapshot):
+        """Versão dos dados: muda a cada leitura completa ou linha nova sincronizada"""
+        return f"{snapshot['full_sync_em']:%Y%m%d%H%M%S}-{snapshot['linhas_lidas']}"
+    
+    @classmethod
+    def _origin(cls, snapshot):
+        """Campos que vêm direto do snapshot (versão, aba, revisão, linhas e agregados)"""
+        return {
+            'versao': cls.version_of(snapshot),
+            'aba': snapshot.get('aba'),
+            'revisao': snapshot.get('revisao'),
+            'linhas_planilha': sum(max(estado['linhas_lidas'] - 1, 0) for estado in snapshot['abas'].values()),
+            'agregados': snapshot.get('agregados') or RollingAggregates.from_frame(snapshot['df']),
+        }
+    
+    @classmethod
+    def from_snapshot(cls, snapshot, atualizado_em):
+        """Monta o dataset (cubo e tabela por referência) a partir de um snapshot sincronizado"""
+        with span('dataset.montar', linhas=len(snapshot['df'])):
+            # memory_usage(deep=True) falha em arrays somente leitura no pandas 2.x: medir antes do índice
+            memoria_bytes = int(snapshot['df'].memory_usage(deep=True).sum())
+            indice_leads = LeadsFilterIndex(snapshot['df'], 'Data/Hora', 'leads')
+            indice_cubo = LeadsFilterIndex(build_cube(snapshot['df']), 'Data', 'cubo')
+            indice_referencias = LeadsFilterIndex(build_reference_table(snapshot['df']), 'Data', 'referencias')
+        return cls(
+            df=indice_leads.df,
+            cubo=indice_cubo.df,
+            total_linhas=len(indice_leads.df),
+            atualizado_em=atualizado_em,
+            indice_leads=indice_leads,
+            indice_cubo=indice_cubo,
+            referencias=indice_referencias.df,
+            indice_referencias=indice_referencias,
+            memoria_bytes=memoria_bytes,
+            **cls._origin(snapshot),
+        )
+    
+    def extended(self, snapshot, novos, atualizado_em):
+        """Dataset de uma sincronização incremental: `novos` (as linhas anexadas ao
+        snapshot) entram nos índices sem reordenar nem reagregar os leads antigos
+        
+        Cubo e tabela por referência ganham só as células dos leads novos; uma
+        célula pode então aparecer em duas linhas, o que não muda nada porque
+        quem lê sempre soma.
+        """
+        if self.empty:
+            return LeadsDataset.from_snapshot(snapshot, atualizado_em)
+        if novos.empty:
+            return replace(self, atualizado_em=atualizado_em, **self._origin(snapshot))
+        
+        with span('dataset.estender', linhas=len(novos)):
+            memoria_bytes = self.memoria_bytes + int(novos.memory_usage(deep=True).sum())
+            indice_leads = self.indice_leads.extended(novos)
+            indice_cubo = self.indice_cubo.extended(build_cube(novos))
+            indice_referencias = self.indice_referencias.extended(build_reference_table(novos))
+        
+        return replace(
+            self,
+            df=indice_leads.df,
+            cubo=indice_cubo.df,
+            total_linhas=len(indice_leads.df),
+            atualizado_em=atualizado_em,
+            indice_leads=indice_leads,
+            indice_cubo=indice_cubo,
+            referencias=indice_referencias.df,
+            indice_referencias=indice_referencias,
+            memoria_bytes=memoria_bytes,
+            **self._origin(snapshot),
+        )
+    
+    @property
+    def empty(self):
+        return self.df.empty
+    
+    def filter(self, periodo=None, tipo='Todos', interesse='Todos'):
+        """Retorna (LeadsView das linhas, cubo, tabela por referência) filtrados pelos mesmos critérios"""
+        return (
+            self.indice_leads.view(periodo, tipo, interesse),
+            self.indice_cubo.query(periodo, tipo, interesse),
+            self.indice_referencias.query(periodo, tipo, interesse),
+        )
+
+def best_interest_cell(leads, com_interesse, minimo):
+    """Posição (no array achatado) da maior taxa de interesse entre as células com pelo menos
+    `minimo` leads; empates ficam com a de mais leads. None se nenhuma célula tiver a amostra mínima
+    """
+    leads, com_interesse = np.ravel(leads), np.ravel(com_interesse)
+    taxas = np.where(leads >= minimo, com_interesse / np.maximum(leads, 1), -1.0)
+    if taxas.max(initial=-1.0) < 0:
+        return None
+    candidatas = np.flatnonzero(taxas == taxas.max())
+    return int(candidatas[np.argmax(leads[candidatas])])
+
+def timeline_buckets(cubo):
+    """Série temporal com granularidade conforme o período, limitada a TIMELINE_MAX_PONTOS
+    
+    Períodos curtos ficam por dia; longos são agregados por semana ou mês.
+    Retorna (df, rótulo do bucket no plural).
+    """
+    diario = cube_counts(cubo, 'Data')
+    dias = (diario.index.max() - diario.index.min()).days + 1
+    
+    if dias <= TIMELINE_MAX_PONTOS:
+        serie, rotulo = diario, 'dias'
+    elif dias / 7 <= TIMELINE_MAX_PONTOS:
+        serie, rotulo = diario.resample('W-MON', label='left', closed='left').sum(), 'semanas'
+    else:
+        serie, rotulo = diario.resample('MS').sum(), 'meses'
+    
+    # Remove buckets sem leads
+    serie = serie[serie['Leads'] > 0].reset_index()
+    serie.columns = ['Data', 'Total_Leads', 'Com_Interesse']
+    return serie, rotulo
+
+def reference_stats(referencias, top_n=None):
+    """Total, leads com interesse, taxa e primeiro contato por referência, em uma única agregação
+    
+    `referencias` é a tabela de build_reference_table (já filtrada). Com top_n, as N referências mais procuradas são escolhidas por seleção
+    parcial (np.argpartition) e só elas são ordenadas.
+    """
+    stats = cube_counts(referencias, 'Imóvel/Referência', ('Leads', 'Com_Interesse', 'Primeiros_Contatos'))
+    
+    if top_n is not None and top_n < len(stats):
+        totais = stats['Leads'].to_numpy()
+        stats = stats.iloc[np.argpartition(-totais, top_n - 1)[:top_n]]
+    
+    ref_df = (
+        stats.sort_values('Leads', ascending=False, kind='stable')
+        .rename_axis('Referência')
+        .rename(columns={'Leads': 'Total', 'Primeiros_Contatos': 'Primeiro_Contato'})
+        .reset_index()
+    )
+    ref_df['Taxa_Interesse'] = (ref_df['Com_Interesse'] / ref_df['Total'] * 100).round(1)
+    
+    return ref_df
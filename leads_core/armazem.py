@@ -0,0 +1,127 @@
+"""
+ARMAZÉM DE LEADS - LUIS IMÓVEIS
+Dados limpos mantidos uma única vez por processo: colunas somente leitura,
+visões das sessões por posição (sem copiar o frame base) e número de versão
+"""
+
+import threading
+
+import numpy as np
+
+def _buffers(valores):
+    """Arrays numpy que guardam os dados de um bloco (ndarray ou extension array do pandas)"""
+    if isinstance(valores, np.ndarray):
+        return [valores]
+    # Categorical/DatetimeArray guardam em _ndarray; Int64/boolean em _data + _mask
+    return [
+        buffer for buffer in (getattr(valores, nome, None) for nome in ('_ndarray', '_data', '_mask'))
+        if isinstance(buffer, np.ndarray)
+    ]
+
+def freeze_frame(df):
+    """Marca os arrays de todas as colunas como somente leitura (no próprio frame, sem cópia)
+    
+    Qualquer escrita acidental de uma sessão no frame compartilhado passa a
+    falhar em vez de alterar os dados das outras sessões.
+    """
+    for bloco in df._mgr.blocks:
+        for buffer in _buffers(bloco.values):
+            buffer.flags.writeable = False
+    return df
+
+class _FatiaPosicional:
+    """`visao.iloc[inicio:fim]`, só com slices, como no DataFrame"""
+    
+    def __init__(self, visao):
+        self.visao = visao
+    
+    def __getitem__(self, fatia):
+        if not isinstance(fatia, slice):
+            raise TypeError("LeadsView.iloc aceita apenas slices")
+        return self.visao.take(fatia)
+
+class LeadsView:
+    """Visão somente leitura de parte das linhas de um frame base
+    
+    Guarda só as posições selecionadas (um intervalo contíguo ou um array de
+    posições); filtros, busca, ordenação e paginação apenas compõem posições.
+    As colunas são materializadas sob demanda, só nas linhas da visão.
+    """
+    
+    def __init__(self, base, posicoes=None):
+        self.base = base
+        self.posicoes = slice(0, len(base)) if posicoes is None else posicoes
+    
+    def __len__(self):
+        if isinstance(self.posicoes, slice):
+            return self.posicoes.stop - self.posicoes.start
+        return len(self.posicoes)
+    
+    @property
+    def empty(self):
+        return len(self) == 0
+    
+    @property
+    def columns(self):
+        return self.base.columns
+    
+    @property
+    def iloc(self):
+        return _FatiaPosicional(self)
+    
+    def _compose(self, selecao):
+        """Posições no frame base de uma seleção (slice ou posições) relativa à visão"""
+        if isinstance(self.posicoes, slice):
+            if isinstance(selecao, slice):
+                inicio, fim, _ = selecao.indices(len(self))
+                return slice(self.posicoes.start + inicio, self.posicoes.start + max(inicio, fim))
+            return np.asarray(selecao, dtype=np.int64) + self.posicoes.start
+        return self.posicoes[selecao]
+    
+    def take(self, selecao):
+        """Nova visão com as linhas `selecao` (slice ou posições relativas a esta visão)"""
+        return LeadsView(self.base, self._compose(selecao))
+    
+    def _materialize(self, dados):
+        if isinstance(self.posicoes, slice):
+            return dados.iloc[self.posicoes]
+        return dados.take(self.posicoes)
+    
+    def __getitem__(self, chave):
+        """Coluna (Series), lista de colunas (DataFrame) ou máscara booleana (nova visão)"""
+        if isinstance(chave, np.ndarray) and chave.dtype == bool:
+            return self.take(np.flatnonzero(chave))
+        return self._materialize(self.base[chave])
+    
+    def to_frame(self, colunas=None):
+        """DataFrame com as linhas da visão (e só as colunas pedidas)"""
+        return self._materialize(self.base if colunas is None else self.base[list(colunas)])
+
+class LeadsStore:
+    """Último LeadsDataset do processo, compartilhado por todas as sessões
+    
+    `versao` é incrementada a cada publicação com dados diferentes; as
+    sessões recebem o mesmo dataset (somente leitura) e o número da versão.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dataset = None
+        self.versao = 0
+    
+    def publish(self, dataset):
+        """Troca o dataset atual; retorna a versão publicada"""
+        with self._lock:
+            if self._dataset is None or self._dataset.versao != dataset.versao:
+                self.versao += 1
+            self._dataset = dataset
+            return self.versao
+    
+    def get(self):
+        """Dataset atual (None antes da primeira carga)"""
+        return self._dataset
+    
+    def current(self):
+        """(versão, dataset) lidos juntos"""
+        with self._lock:
+            return self.versao, self._dataset
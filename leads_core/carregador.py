@@ -0,0 +1,485 @@
+"""
+CARREGADOR DE LEADS - LUIS IMÓVEIS
+Snapshot local em Parquet, sincronização incremental com a planilha e a
+thread de fundo que mantém o último LeadsDataset válido
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import replace
+from datetime import datetime
+
+from . import config
+from .agregacoes import LeadsDataset
+from .armazem import LeadsStore
+from .comparacoes import RollingAggregates
+from .config import (
+    FULL_RESYNC_INTERVALO, PROBE_INTERVALO, REFRESH_BACKOFF_INICIAL, REFRESH_BACKOFF_MAX,
+    REFRESH_INTERVALO, REFRESH_JITTER, SNAPSHOT_DELTAS_MAX, SNAPSHOT_META_KEY, SNAPSHOT_VERSAO, TIMEZONE,
+)
+from .esquema import resolve_schema
+from .identidade import LeadIdentityIndex, assign_lead_ids, mark_first_contacts
+from .limpeza import LeadKeyIndex, clean_tab, concat_leads, deduplicate_leads, merge_leads
+from .telemetria import span, timed
+
+logger = logging.getLogger(__name__)
+
+def _read_parquet(caminho):
+    """(DataFrame, metadados) de um arquivo do snapshot; levanta se o arquivo não servir"""
+    import pyarrow.parquet as pq
+    
+    table = pq.read_table(caminho)
+    meta = json.loads(table.schema.metadata[SNAPSHOT_META_KEY])
+    if meta['versao'] != SNAPSHOT_VERSAO:
+        raise ValueError(f"snapshot da versão {meta['versao']}")
+    return table.to_pandas(), meta
+
+def _write_parquet(df, meta, caminho, nome_span):
+    """Grava df com os metadados no próprio arquivo, de forma atômica (temporário + rename)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        SNAPSHOT_META_KEY: json.dumps(meta).encode('utf-8'),
+    })
+    
+    with span(nome_span, linhas=len(df)) as medida:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        tmp_path = caminho + '.tmp'
+        pq.write_table(table, tmp_path)
+        medida['bytes'] = os.path.getsize(tmp_path)
+        os.replace(tmp_path, caminho)
+
+def _delta_path(sequencia):
+    return os.path.join(config.SNAPSHOT_DELTAS_DIR, f'{sequencia:05d}.parquet')
+
+def _snapshot_meta(snapshot):
+    """Metadados do estado sincronizado, gravados no base e em cada delta (com o base a que ele pertence)"""
+    return {
+        'versao': SNAPSHOT_VERSAO,
+        'schema': {col: str(dtype) for col, dtype in snapshot['df'].dtypes.items()},
+        'abas': snapshot['abas'],
+        'linhas_lidas': snapshot['linhas_lidas'],
+        'revisao': snapshot['revisao'],
+        'aba': snapshot['aba'],
+        'sincronizado_em': snapshot['sincronizado_em'].isoformat(),
+        'full_sync_em': snapshot['full_sync_em'].isoformat(),
+        'base': snapshot['base'],
+        'deltas': snapshot['deltas'],
+    }
+
+def load_snapshot():
+    """Lê o snapshot colunar local (None se inexistente, corrompido ou de outra versão)
+    
+    O snapshot é o arquivo base mais os deltas gravados depois dele, em ordem;
+    o estado (abas, revisão) é o do último delta válido. Deltas de outro base
+    (sobras de uma compactação interrompida) ou fora de sequência são ignorados.
+    """
+    try:
+        df, meta = _read_parquet(config.SNAPSHOT_PATH)
+        frames = [df]
+        for sequencia in range(1, SNAPSHOT_DELTAS_MAX + 1):
+            caminho = _delta_path(sequencia)
+            if not os.path.exists(caminho):
+                break
+            try:
+                delta, meta_delta = _read_parquet(caminho)
+            except Exception:
+                break
+            if meta_delta['base'] != meta['base'] or meta_delta['deltas'] != sequencia:
+                break
+            frames.append(delta)
+            meta = meta_delta
+        
+        # Base primeiro: as categorias dele não são recodificadas; deltas vazios são descartados
+        df = merge_leads(frames)
+        if {col: str(dtype) for col, dtype in df.dtypes.items()} != meta['schema']:
+            return None
+    except Exception:
+        return None
+    
+    return {
+        'df': df,
+        'abas': meta['abas'],
+        'linhas_lidas': meta['linhas_lidas'],
+        'revisao': meta['revisao'],
+        'aba': meta.get('aba'),
+        'sincronizado_em': datetime.fromisoformat(meta['sincronizado_em']),
+        'full_sync_em': datetime.fromisoformat(meta['full_sync_em']),
+        'base': meta['base'],
+        'deltas': meta['deltas'],
+    }
+
+def save_snapshot(snapshot):
+    """Grava o snapshot inteiro como novo arquivo base e descarta os deltas anteriores
+    
+    Usado na leitura completa e na compactação. A escrita é atômica (arquivo
+    temporário + rename), então dados e metadados nunca ficam dessincronizados;
+    deltas que sobrarem de uma falha no meio apontam para o base antigo e são
+    ignorados na leitura.
+    """
+    base = uuid.uuid4().hex
+    meta = {**_snapshot_meta(snapshot), 'base': base, 'deltas': 0}
+    _write_parquet(snapshot['df'], meta, config.SNAPSHOT_PATH, 'snapshot.salvar')
+    snapshot['base'], snapshot['deltas'] = base, 0
+    
+    if os.path.isdir(config.SNAPSHOT_DELTAS_DIR):
+        for nome in os.listdir(config.SNAPSHOT_DELTAS_DIR):
+            os.remove(os.path.join(config.SNAPSHOT_DELTAS_DIR, nome))
+
+def append_snapshot(snapshot, novos):
+    """Grava só as linhas novas de uma sincronização incremental como um delta do snapshot
+    
+    `snapshot['df']` já inclui `novos` no final. A cada SNAPSHOT_DELTAS_MAX
+    deltas o snapshot é compactado (regravado inteiro em um base novo).
+    """
+    if snapshot['base'] is None or snapshot['deltas'] >= SNAPSHOT_DELTAS_MAX:
+        save_snapshot(snapshot)
+        return
+    
+    sequencia = snapshot['deltas'] + 1
+    meta = {**_snapshot_meta(snapshot), 'deltas': sequencia}
+    _write_parquet(novos, meta, _delta_path(sequencia), 'snapshot.delta')
+    snapshot['deltas'] = sequencia
+
+def get_sheet_revision(spreadsheet):
+    """Revisão da planilha de origem (modifiedTime do Drive); None se indisponível"""
+    try:
+        return spreadsheet.get_lastUpdateTime()
+    except Exception:
+        return None
+
+def fetch_ranges(spreadsheet, ranges):
+    """Lê vários intervalos (de quaisquer abas) em uma única chamada values_batch_get"""
+    with span('planilha.fetch', intervalos=len(ranges)) as medida:
+        resposta = spreadsheet.values_batch_get(ranges)
+        # Intervalos vazios vêm sem a chave 'values'
+        valores = [intervalo.get('values', []) for intervalo in resposta.get('valueRanges', [])]
+        medida['linhas'] = sum(len(linhas) for linhas in valores)
+    return valores
+
+def data_range(titulo, headers, primeira_linha):
+    """Intervalo A1 das linhas de uma aba a partir de `primeira_linha`, até a última coluna do cabeçalho"""
+    from gspread.utils import absolute_range_name, rowcol_to_a1
+    
+    ultima_coluna = re.sub(r'\d', '', rowcol_to_a1(1, max(len(headers), 1)))
+    return absolute_range_name(titulo, f"A{primeira_linha}:{ultima_coluna}")
+
+def continued_rows(linhas, estado):
+    """Linhas novas de uma aba lida a partir da última linha já sincronizada
+    
+    A primeira linha devolvida tem que ser igual à última lida (`ultima_linha`):
+    se não for, a aba não só cresceu no final (linhas removidas, inseridas ou
+    a última editada) e o retorno é None. Aba sem cabeçalho é lida desde a linha 1.
+    """
+    if not estado['linhas_lidas']:
+        return linhas
+    if not linhas or linhas[0] != estado['ultima_linha']:
+        return None
+    return linhas[1:]
+
+@timed('sincronizar')
+def sync_leads(spreadsheet, titulos, snapshot=None):
+    """Sincroniza o snapshot local com todas as abas de leads, baixando só as linhas novas
+    
+    Todas as abas são lidas em uma única requisição. Retorna (snapshot, linhas_novas).
+    Faz leitura completa quando não há snapshot, quando as abas ou algum cabeçalho
+    mudaram, quando a última linha lida de uma aba não confere mais (linhas
+    removidas ou inseridas), quando a planilha mudou sem linhas novas (edição)
+    ou a cada FULL_RESYNC_INTERVALO. `snapshot` é o último resultado em
+    memória (lido do disco se None); o índice de identidade dos leads, as
+    chaves de duplicidade e os agregados de comparação seguem nele,
+    atualizados só com as linhas novas, que vão para o disco como um delta.
+    Na leitura completa os cabeçalhos são validados antes do download: uma aba
+    sem coluna obrigatória levanta SchemaError após uma única chamada leve.
+    """
+    from gspread.utils import absolute_range_name
+    
+    agora = datetime.now(TIMEZONE)
+    titulos = list(titulos)
+    if snapshot is None:
+        snapshot = load_snapshot()
+    if snapshot is not None and snapshot.get('identidades') is None:
+        snapshot['identidades'] = LeadIdentityIndex.from_frame(snapshot['df'])
+    if snapshot is not None and snapshot.get('agregados') is None:
+        snapshot['agregados'] = RollingAggregates.from_frame(snapshot['df'])
+    if snapshot is not None and snapshot.get('chaves') is None:
+        snapshot['chaves'] = LeadKeyIndex.from_frame(snapshot['df'])
+    
+    if (snapshot is not None and list(snapshot['abas']) == titulos
+            and agora - snapshot['full_sync_em'] < FULL_RESYNC_INTERVALO):
+        # Cópia do estado das abas: o snapshot anterior só é trocado se tudo der certo
+        abas = {titulo: dict(estado) for titulo, estado in snapshot['abas'].items()}
+        
+        # Por aba: cabeçalho (para detectar mudanças) + linhas a partir da última lida (para conferi-la)
+        ranges = []
+        for titulo, estado in abas.items():
+            ranges.append(absolute_range_name(titulo, '1:1'))
+            ranges.append(data_range(titulo, estado['headers'], max(estado['linhas_lidas'], 1)))
+        valores = fetch_ranges(spreadsheet, ranges)
+        cabecalhos, lidas_por_aba = valores[0::2], valores[1::2]
+        novas_por_aba = [continued_rows(lidas, estado) for lidas, estado in zip(lidas_por_aba, abas.values())]
+        
+        if all((cabecalho[0] if cabecalho else []) == estado['headers'] and novas_linhas is not None
+               for cabecalho, estado, novas_linhas in zip(cabecalhos, abas.values(), novas_por_aba)):
+            frames = []
+            linhas_novas = 0
+            for (titulo, estado), novas_linhas in zip(abas.items(), novas_por_aba):
+                if novas_linhas:
+                    frames.append(clean_tab(titulo, estado['headers'], novas_linhas))
+                    estado['linhas_lidas'] += len(novas_linhas)
+                    estado['ultima_linha'] = novas_linhas[-1]
+                    linhas_novas += len(novas_linhas)
+            
+            if linhas_novas:
+                # Só o lote novo é deduplicado (contra as chaves do snapshot) e passa pelo índice de identidade
+                novos = deduplicate_leads(merge_leads(frames), snapshot['chaves'])
+                # Identidades novas só ficam no índice se o delta for gravado: na nova
+                # tentativa o lote ainda é primeiro contato
+                with snapshot['identidades'].transaction():
+                    novos = assign_lead_ids(novos, snapshot['identidades'])
+                    df = concat_leads(snapshot['df'], novos) if not novos.empty else snapshot['df']
+                    # Linhas novas ficam no final do frame
+                    adicionadas = df.iloc[len(snapshot['df']):]
+                    snapshot = {
+                        **snapshot,
+                        'abas': abas,
+                        'linhas_lidas': sum(estado['linhas_lidas'] for estado in abas.values()),
+                        'df': df,
+                        'chaves': snapshot['chaves'].updated(adicionadas),
+                        'agregados': snapshot['agregados'].updated(adicionadas),
+                        # Revisão guardada para a próxima sincronização reconhecer edições sem linhas novas
+                        'revisao': get_sheet_revision(spreadsheet),
+                        'sincronizado_em': agora,
+                    }
+                    # No disco, só as linhas novas (um delta); o base é regravado na compactação
+                    append_snapshot(snapshot, adicionadas)
+                return snapshot, linhas_novas
+            
+            # Sem linhas novas, mas a planilha mudou desde a última sincronização: edição em linha já lida
+            revisao = get_sheet_revision(spreadsheet)
+            if revisao is None or snapshot['revisao'] is None or revisao == snapshot['revisao']:
+                return snapshot, 0
+        
+        logger.info("Abas mudaram além de linhas novas no final: leitura completa")
+    
+    # Leitura completa: primeiro só os cabeçalhos de todas as abas (uma chamada leve)
+    cabecalhos = fetch_ranges(spreadsheet, [absolute_range_name(titulo, '1:1') for titulo in titulos])
+    headers_por_aba = {titulo: (cabecalho[0] if cabecalho else []) for titulo, cabecalho in zip(titulos, cabecalhos)}
+    with span('esquema.validar', abas=len(titulos)):
+        for titulo, headers in headers_por_aba.items():
+            # Aba sem cabeçalho é tratada como vazia
+            if headers:
+                resolve_schema(titulo, headers)
+    
+    # Depois os dados de todas as abas com cabeçalho, também em uma única chamada
+    # CORREÇÃO: ler os valores brutos (como get_all_values) para não perder linhas
+    com_dados = [titulo for titulo, headers in headers_por_aba.items() if headers]
+    valores = fetch_ranges(spreadsheet, [data_range(titulo, headers_por_aba[titulo], 2) for titulo in com_dados]) if com_dados else []
+    linhas_por_aba = dict(zip(com_dados, valores))
+    
+    abas = {}
+    frames = []
+    for titulo, headers in headers_por_aba.items():
+        linhas = linhas_por_aba.get(titulo, [])
+        abas[titulo] = {
+            'headers': headers,
+            'linhas_lidas': len(linhas) + 1 if headers else 0,
+            # Conferida na próxima sincronização incremental (o cabeçalho, se a aba não tem dados)
+            'ultima_linha': linhas[-1] if linhas else headers,
+        }
+        if linhas:
+            frames.append(clean_tab(titulo, headers, linhas))
+    
+    # Lead_IDs já conhecidos são mantidos; o primeiro contato é recalculado pela data.
+    # Como no incremental, o índice só guarda as identidades novas se o snapshot for gravado
+    identidades = snapshot['identidades'] if snapshot is not None else LeadIdentityIndex()
+    with identidades.transaction():
+        df = mark_first_contacts(assign_lead_ids(deduplicate_leads(merge_leads(frames)), identidades))
+        snapshot = {
+            'abas': abas,
+            'linhas_lidas': sum(estado['linhas_lidas'] for estado in abas.values()),
+            'df': df,
+            'revisao': None,
+            'aba': ', '.join(titulos),
+            'sincronizado_em': agora,
+            'full_sync_em': agora,
+            'identidades': identidades,
+            'agregados': RollingAggregates.from_frame(df),
+            'chaves': LeadKeyIndex.from_frame(df),
+            'base': None,  # sem arquivo base até o primeiro save_snapshot
+            'deltas': 0,
+        }
+        
+        if df.empty:
+            # Planilha sem dados: nada a gravar
+            return snapshot, 0
+        
+        snapshot['revisao'] = get_sheet_revision(spreadsheet)
+        save_snapshot(snapshot)
+    return snapshot, sum(max(estado['linhas_lidas'] - 1, 0) for estado in abas.values())
+
+def refresh_snapshot(client, snapshot=None):
+    """Atualiza o snapshot local a partir de todas as abas de leads da planilha"""
+    from gspread.exceptions import APIError, WorksheetNotFound
+    
+    worksheets = client.worksheets()
+    
+    if not worksheets:
+        raise RuntimeError("Nenhuma aba encontrada na planilha")
+    
+    try:
+        return sync_leads(worksheets[0].spreadsheet, [ws.title for ws in worksheets], snapshot)
+    except (WorksheetNotFound, APIError):
+        # Aba renomeada/removida: resolver de novo na próxima tentativa
+        client.invalidate()
+        raise
+
+class LeadsRefresher:
+    """Thread de fundo dona dos dados: recarrega a planilha quando ela muda
+    
+    A cada `intervalo_sonda` segundos consulta só a revisão da planilha (uma
+    chamada barata) e sincroniza quando ela muda; notify() (webhook) força a
+    sincronização na hora e `intervalo` é o teto entre sincronizações.
+    As páginas sempre leem o último DataFrame válido (stale-while-revalidate);
+    só a primeira carga de um processo sem snapshot precisa esperar a rede.
+    `criar_cliente` monta o cliente da planilha (SheetsClient ou equivalente)
+    dentro da thread de fundo. Com `historico` (LeadsHistory), as linhas
+    sincronizadas também são gravadas no histórico local.
+    """
+    
+    def __init__(self, criar_cliente, intervalo=REFRESH_INTERVALO, historico=None, intervalo_sonda=PROBE_INTERVALO):
+        self.criar_cliente = criar_cliente
+        self.intervalo = intervalo
+        self.intervalo_sonda = intervalo_sonda
+        self.historico = historico
+        self.falhas = 0
+        self.ultimo_erro = None
+        self._client = None  # criado na thread de fundo, reutilizado entre atualizações
+        self.armazem = LeadsStore()  # último LeadsDataset válido, compartilhado pelas sessões
+        self._snapshot = None  # último snapshot sincronizado (evita reler o Parquet a cada ciclo)
+        self._primeira_carga = threading.Event()
+        self._acordar = threading.Event()  # notify(): sincronizar sem esperar a sonda
+        self._revisao_vista = None  # revisão da planilha na última sincronização
+        self._historico_semeado = False  # histórico já recebeu o snapshot inteiro neste processo
+        
+        self._snapshot = load_snapshot()
+        if self._snapshot is not None:
+            self.armazem.publish(LeadsDataset.from_snapshot(self._snapshot, self._snapshot['sincronizado_em']))
+            self._primeira_carga.set()
+        
+        self._thread = threading.Thread(target=self._run, name='leads-refresher', daemon=True)
+        self._thread.start()
+    
+    def get(self):
+        """Retorna o LeadsDataset do último carregamento bem-sucedido (ou None)"""
+        return self.armazem.get()
+    
+    def wait_first_load(self, timeout=None):
+        """Bloqueia até a primeira tentativa de carga terminar"""
+        return self._primeira_carga.wait(timeout)
+    
+    def notify(self):
+        """Pede uma sincronização imediata (ex.: webhook do Apps Script avisando uma alteração)"""
+        self._acordar.set()
+    
+    def _probe_revision(self):
+        """Revisão atual da planilha, sem ler valores (None se ainda sem cliente ou indisponível)"""
+        if self._client is None:
+            return None
+        
+        with span('sonda') as medida:
+            try:
+                worksheets = self._client.worksheets()
+            except Exception:
+                return None
+            revisao = get_sheet_revision(worksheets[0].spreadsheet) if worksheets else None
+            medida['mudou'] = revisao is not None and revisao != self._revisao_vista
+        return revisao
+    
+    def _next_delay(self):
+        """Intervalo até a próxima atualização, com backoff exponencial após erros e jitter"""
+        if self.falhas:
+            espera = min(REFRESH_BACKOFF_INICIAL * 2 ** (self.falhas - 1), REFRESH_BACKOFF_MAX)
+        else:
+            espera = self.intervalo
+        return espera * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+    
+    def _mirror_history(self, anterior, snapshot):
+        """Grava no histórico só as linhas que o ciclo trouxe (todas após uma leitura completa)
+        
+        O primeiro ciclo do processo grava o snapshot inteiro (o histórico pode
+        estar vazio ou atrás do snapshot lido do disco); os seguintes, só o que chegou.
+        """
+        if self.historico is None or (snapshot is anterior and self._historico_semeado):
+            return
+        
+        df = snapshot['df']
+        incremental = anterior is not None and anterior['full_sync_em'] == snapshot['full_sync_em']
+        if incremental and self._historico_semeado:
+            # Sincronização incremental só anexa linhas ao final do snapshot
+            df = df.iloc[len(anterior['df']):]
+        try:
+            self.historico.mirror(df)
+            self._historico_semeado = True
+        except Exception as e:
+            # Histórico é complementar: falha nele não derruba a atualização dos dados
+            logger.warning("Falha ao gravar o histórico de leads: %s", e)
+    
+    def _run(self):
+        proxima = 0.0  # próxima sincronização obrigatória (time.monotonic)
+        while True:
+            notificado = self._acordar.is_set()
+            self._acordar.clear()
+            # Durante o backoff de erros a sonda também espera
+            revisao = self._probe_revision() if not self.falhas else None
+            mudou = revisao is not None and revisao != self._revisao_vista
+            
+            if notificado or mudou or time.monotonic() >= proxima:
+                if self._refresh():
+                    # Revisão sondada antes da sincronização: uma alteração durante ela ainda é vista depois
+                    self._revisao_vista = revisao or self._probe_revision()
+                proxima = time.monotonic() + self._next_delay()
+            
+            espera = proxima - time.monotonic()
+            self._acordar.wait(max(espera if self.falhas else min(espera, self.intervalo_sonda), 0))
+    
+    def _refresh(self):
+        """Uma sincronização completa do ciclo; True se deu certo"""
+        try:
+            if self._client is None:
+                self._client = self.criar_cliente()
+            anterior = self._snapshot
+            snapshot, _ = refresh_snapshot(self._client, anterior)
+            self._snapshot = snapshot
+            # Histórico antes da publicação: a página que reage à versão nova já lê as linhas novas nele
+            self._mirror_history(anterior, snapshot)
+            agora = datetime.now(TIMEZONE)
+            atual = self.armazem.get()
+            if atual is not None and atual.versao == LeadsDataset.version_of(snapshot):
+                # Nada mudou: reaproveita cubo, índices e figuras em cache (mesma versão do armazém)
+                self.armazem.publish(replace(atual, atualizado_em=agora))
+            elif (atual is not None and anterior is not None and atual.versao == LeadsDataset.version_of(anterior)
+                    and snapshot['full_sync_em'] == anterior['full_sync_em']):
+                # Sincronização incremental: o dataset publicado só recebe as linhas anexadas
+                self.armazem.publish(atual.extended(snapshot, snapshot['df'].iloc[len(anterior['df']):], agora))
+            else:
+                self.armazem.publish(LeadsDataset.from_snapshot(snapshot, agora))
+            self.falhas = 0
+            self.ultimo_erro = None
+            return True
+        except Exception as e:
+            self.falhas += 1
+            self.ultimo_erro = e
+            logger.warning("Falha ao atualizar leads (tentativa %d): %s", self.falhas, e)
+            return False
+        finally:
+            self._primeira_carga.set()
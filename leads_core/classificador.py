@@ -0,0 +1,86 @@
+"""
+CLASSIFICADOR DE TIPO DE IMÓVEL - LUIS IMÓVEIS
+Tabela de regras aplicada uma vez por referência distinta
+"""
+
+import json
+import re
+import logging
+
+import numpy as np
+import pandas as pd
+
+from .config import REGRAS_TIPO_IMOVEL, REGRAS_TIPO_PATH
+
+logger = logging.getLogger(__name__)
+
+def load_property_rules(path=None):
+    """Carrega a tabela de regras de tipo de imóvel
+    
+    Usa o JSON em LEADS_REGRAS_TIPO (ou regras_tipo_imovel.json ao lado do app)
+    quando existir, no formato [{"regra": "prefixo|igual|contem",
+    "padroes": [...], "tipo": "..."}]; senão, as regras padrão.
+    """
+    path = path or REGRAS_TIPO_PATH
+    try:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        return REGRAS_TIPO_IMOVEL
+    
+    regras = []
+    for item in config:
+        if item['regra'] not in ('prefixo', 'igual', 'contem'):
+            raise ValueError(f"Regra desconhecida em {path}: {item['regra']}")
+        regras.append((item['regra'], [p.upper().strip() for p in item['padroes']], item['tipo']))
+    
+    return regras
+
+def identify_property_type(reference, regras=None):
+    """Identifica tipo do imóvel pela referência"""
+    if pd.isna(reference) or reference == '':
+        return 'Indefinido'
+    
+    ref = str(reference).upper().strip()
+    
+    for regra, padroes, tipo in regras or load_property_rules():
+        if regra == 'prefixo' and ref.startswith(tuple(padroes)):
+            return tipo
+        if regra == 'igual' and ref in padroes:
+            return tipo
+        if regra == 'contem' and any(padrao in ref for padrao in padroes):
+            return tipo
+    
+    return 'Outros'
+
+def classify_property_types(referencias, regras=None):
+    """Classifica uma coluna de referências pela tabela de regras
+    
+    Cada referência distinta é classificada uma única vez (elas se repetem
+    muito) e as regras viram máscaras vetorizadas aplicadas em ordem de
+    prioridade: a primeira que casar define o tipo.
+    """
+    regras = regras or load_property_rules()
+    codigos, unicas = pd.factorize(referencias)
+    
+    unicas = pd.Series(unicas, dtype=object)
+    refs = unicas.astype(str).str.upper().str.strip()
+    tipos = np.full(len(refs), 'Outros', dtype=object)
+    pendentes = np.ones(len(refs), dtype=bool)
+    
+    for regra, padroes, tipo in regras:
+        if regra == 'prefixo':
+            mask = refs.str.startswith(tuple(padroes))
+        elif regra == 'igual':
+            mask = refs.isin(padroes)
+        else:
+            mask = refs.str.contains('|'.join(map(re.escape, padroes)))
+        mask = mask.to_numpy() & pendentes
+        tipos[mask] = tipo
+        pendentes &= ~mask
+    
+    tipos[(unicas == '').to_numpy()] = 'Indefinido'
+    
+    # Nulos (código -1) também são indefinidos
+    tipos = np.append(tipos, 'Indefinido')
+    return pd.Series(tipos[codigos], index=referencias.index)
@@ -0,0 +1,184 @@
+"""
+COMPARAÇÕES DE PERÍODO E COORTES - LUIS IMÓVEIS
+Agregados por dia e por lead mantidos incrementalmente: cada lote novo só
+soma as próprias linhas, e as comparações custam O(dias), não O(leads)
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from .config import REFERENCIAS_DESTAQUE, TIMEZONE
+
+# Buckets diários: dimensões que os filtros da sidebar usam nas comparações, mais a
+# referência quando ela é uma das REFERENCIAS_DESTAQUE ('' nas demais)
+DIMENSOES_DIARIAS = ['Data', 'Tipo Imóvel', 'Interesse_Bool', 'Destaque']
+# Status dos leads que nunca tiveram um informado
+STATUS_VAZIO = 'Sem status'
+
+def daily_buckets(df):
+    """Leads e primeiros contatos por (dia, tipo, interesse, referência em destaque) de um lote de linhas"""
+    referencias = df['Imóvel/Referência'].astype(object) if 'Imóvel/Referência' in df.columns else pd.Series('', index=df.index)
+    base = pd.DataFrame({
+        'Data': df['Data/Hora'].dt.normalize(),
+        'Tipo Imóvel': df['Tipo Imóvel'].astype(object) if 'Tipo Imóvel' in df.columns else 'Outros',
+        'Interesse_Bool': df['Interesse_Bool'].astype(bool),
+        'Destaque': referencias.where(referencias.isin(REFERENCIAS_DESTAQUE), ''),
+        'Primeiros_Contatos': df['Primeiro_Contato'].astype('int64') if 'Primeiro_Contato' in df.columns else 1,
+    })
+    # Linhas sem data ficam de fora (groupby descarta chaves vazias)
+    return (
+        base.groupby(DIMENSOES_DIARIAS)['Primeiros_Contatos'].agg(['size', 'sum'])
+        .rename(columns={'size': 'Leads', 'sum': 'Primeiros_Contatos'})
+        .astype('int64')
+    )
+
+def lead_summary(df):
+    """Por Lead_ID: primeira data e o último status informado (com a data dele), de um lote de linhas"""
+    if 'Lead_ID' not in df.columns:
+        df = df.assign(Lead_ID=pd.Series(pd.NA, index=df.index, dtype='Int64'))
+    
+    com_chave = df['Lead_ID'].notna() & df['Data/Hora'].notna()
+    status = df['Status'][com_chave].astype(object) if 'Status' in df.columns else None
+    if status is not None:
+        # Status em branco não substitui o último informado
+        status = status.where(status.astype(str).str.strip() != '')
+    base = pd.DataFrame({
+        'Lead_ID': df['Lead_ID'][com_chave].astype('int64'),
+        'Data': df['Data/Hora'][com_chave],
+        'Status': status,
+    }).sort_values('Data', kind='stable')
+    
+    informados = base[base['Status'].notna()].groupby('Lead_ID', sort=False)
+    resumo = pd.DataFrame({'Primeira_Data': base.groupby('Lead_ID', sort=False)['Data'].first()})
+    resumo['Data_Status'] = informados['Data'].last()
+    resumo['Status'] = informados['Status'].last()
+    return resumo
+
+def cohort_week(datas):
+    """Segunda-feira da semana de cada data (sem fuso), usada como rótulo da coorte"""
+    locais = datas.dt.tz_convert(TIMEZONE).dt.tz_localize(None).dt.normalize()
+    return locais - pd.to_timedelta(locais.dt.weekday, unit='D')
+
+def cohort_counts(leads):
+    """Leads por (semana do primeiro contato, status atual)"""
+    if leads.empty:
+        # Índice com os mesmos nomes: sub/add com as coortes existentes continuam alinhando
+        vazio = pd.MultiIndex.from_arrays([pd.DatetimeIndex([]), pd.Index([], dtype=object)], names=['Semana', 'Status'])
+        return pd.Series(0, index=vazio, dtype='int64')
+    
+    chaves = pd.DataFrame({'Semana': cohort_week(leads['Primeira_Data']), 'Status': leads['Status'].fillna(STATUS_VAZIO)})
+    return chaves.groupby(['Semana', 'Status']).size()
+
+@dataclass(frozen=True)
+class RollingAggregates:
+    """Agregados de comparação de um snapshot, atualizados só com as linhas novas
+    
+    `diario` soma leads por (dia, tipo, interesse, destaque); `leads` guarda, por Lead_ID,
+    a primeira data (define a coorte) e o último status informado; `coortes` conta leads
+    por (semana do primeiro contato, status). updated() devolve uma nova
+    instância, então o dataset em uso pelas sessões nunca muda por baixo delas.
+    """
+    diario: pd.DataFrame
+    leads: pd.DataFrame
+    coortes: pd.Series
+    
+    @classmethod
+    def from_frame(cls, df):
+        """Agregados completos de um frame de leads (leitura completa ou snapshot do disco)"""
+        if df.empty:
+            vazio = pd.DataFrame({'Data/Hora': pd.Series([], dtype=f'datetime64[us, {TIMEZONE.zone}]'),
+                                  'Interesse_Bool': pd.Series([], dtype=bool)})
+            return cls(daily_buckets(vazio), lead_summary(vazio), cohort_counts(lead_summary(vazio)))
+    
+        leads = lead_summary(df)
+        return cls(daily_buckets(df), leads, cohort_counts(leads))
+    
+    def updated(self, df_novos):
+        """Agregados somados às linhas novas: O(linhas novas + leads afetados + dias)"""
+        if df_novos.empty:
+            return self
+    
+        diario = self.diario.add(daily_buckets(df_novos), fill_value=0).astype('int64')
+    
+        novos = lead_summary(df_novos)
+        conhecidos = novos.index.intersection(self.leads.index)
+        antes = self.leads.loc[conhecidos]
+    
+        # Leads já vistos: primeira data é a menor; status é o do contato mais recente
+        depois = antes.copy()
+        chegada = novos.loc[conhecidos]
+        depois['Primeira_Data'] = antes['Primeira_Data'].where(
+            antes['Primeira_Data'] <= chegada['Primeira_Data'], chegada['Primeira_Data']
+        )
+        mais_recente = chegada['Data_Status'].notna() & ~(chegada['Data_Status'] < antes['Data_Status'])
+        depois.loc[mais_recente, ['Data_Status', 'Status']] = chegada.loc[mais_recente, ['Data_Status', 'Status']]
+    
+        ineditos = novos.drop(conhecidos)
+        leads = self.leads.copy()
+        leads.loc[conhecidos] = depois
+        leads = pd.concat([leads, ineditos])
+    
+        # Coortes: tira a contagem antiga dos leads afetados e soma a nova
+        coortes = (
+            self.coortes
+            .sub(cohort_counts(antes), fill_value=0)
+            .add(cohort_counts(pd.concat([depois, ineditos])), fill_value=0)
+            .astype('int64')
+        )
+        return RollingAggregates(diario, leads, coortes[coortes > 0])
+    
+    @cached_property
+    def _niveis(self):
+        """Níveis do índice diário como arrays (calculados uma vez por instância)"""
+        indice = self.diario.index
+        return (
+            indice.get_level_values('Data'),
+            indice.get_level_values('Tipo Imóvel').to_numpy(dtype=object),
+            indice.get_level_values('Interesse_Bool').to_numpy(dtype=bool),
+            indice.get_level_values('Destaque').to_numpy(dtype=object),
+        )
+    
+    def window_totals(self, inicio, fim, tipo='Todos', interesse='Todos'):
+        """Totais dos dias [inicio, fim] (datas inclusivas) com os filtros da sidebar
+        
+        Além de leads, interesse, primeiros contatos e lançamentos, traz o total
+        de cada uma das REFERENCIAS_DESTAQUE (chave = a própria referência).
+        """
+        datas, tipos, com_interesse, destaques = self._niveis
+        mask = np.asarray(
+            (datas >= pd.Timestamp(inicio, tz=TIMEZONE)) & (datas < pd.Timestamp(fim + timedelta(days=1), tz=TIMEZONE))
+        )
+        if tipo != 'Todos':
+            mask &= tipos == tipo
+        if interesse == "Apenas com interesse":
+            mask &= com_interesse
+        elif interesse == "Apenas sem interesse":
+            mask &= ~com_interesse
+    
+        leads = self.diario['Leads'].to_numpy()
+        return {
+            'Leads': int(leads[mask].sum()),
+            'Com_Interesse': int(leads[mask & com_interesse].sum()),
+            'Primeiros_Contatos': int(self.diario['Primeiros_Contatos'].to_numpy()[mask].sum()),
+            'Lançamentos': int(leads[mask & (tipos == 'Lançamento')].sum()),
+            **{referencia: int(leads[mask & (destaques == referencia)].sum()) for referencia in REFERENCIAS_DESTAQUE},
+        }
+    
+    def compare_periods(self, fim, dias, tipo='Todos', interesse='Todos'):
+        """(totais dos `dias` dias até `fim`, totais dos `dias` dias anteriores)"""
+        inicio = fim - timedelta(days=dias - 1)
+        atual = self.window_totals(inicio, fim, tipo, interesse)
+        anterior = self.window_totals(inicio - timedelta(days=dias), inicio - timedelta(days=1), tipo, interesse)
+        return atual, anterior
+    
+    def cohorts(self, semanas=12):
+        """Leads por semana do primeiro contato (últimas `semanas`) x status atual"""
+        if self.coortes.empty:
+            return pd.DataFrame()
+    
+        tabela = self.coortes.unstack('Status', fill_value=0)
+        return tabela.sort_index().tail(semanas)
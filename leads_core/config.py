@@ -0,0 +1,114 @@
+"""
+CONFIGURAÇÕES DO NÚCLEO DE LEADS - LUIS IMÓVEIS
+Planilha, snapshot local, regras de classificação e esquema das colunas
+"""
+
+import os
+from datetime import timedelta
+
+import pytz
+
+# Raiz do projeto (o snapshot e as regras continuam ao lado do dashboard)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Configurações
+PLANILHA_ID = "1xtn9-jreUtGPRh_ZQUaeNHq253iztZwXJ8uSmDc2_gc"
+WORKSHEET_NAMES = ['Leads_Todos_Imoveis', 'Leads_Lancamentos', 'Sheet1']
+
+# Snapshot local usado pela sincronização incremental
+CACHE_DIR = os.environ.get('LEADS_CACHE_DIR', os.path.join(RAIZ, '.cache'))
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'leads_snapshot.parquet')
+SNAPSHOT_META_KEY = b'leads_snapshot'
+# Linhas das sincronizações incrementais, um Parquet pequeno por ciclo, até a próxima compactação
+SNAPSHOT_DELTAS_DIR = os.path.join(CACHE_DIR, 'leads_snapshot.deltas')
+# Deltas acumulados antes de regravar o snapshot base com todas as linhas
+SNAPSHOT_DELTAS_MAX = 20
+# Incrementar quando a limpeza mudar as colunas/tipos (invalida snapshots antigos)
+SNAPSHOT_VERSAO = 8
+# Histórico local (SQLite) com todos os leads já sincronizados, mesmo os que saírem da planilha
+HISTORICO_PATH = os.environ.get('LEADS_HISTORICO_PATH', os.path.join(CACHE_DIR, 'leads_historico.sqlite'))
+# Releitura completa periódica para capturar edições/remoções em linhas antigas
+FULL_RESYNC_INTERVALO = timedelta(hours=24)
+TIMEZONE = pytz.timezone('America/Sao_Paulo')
+
+# Atualização em segundo plano (segundos)
+REFRESH_INTERVALO = 300
+REFRESH_JITTER = 0.1  # ±10% para não sincronizar workers
+REFRESH_BACKOFF_INICIAL = 30
+REFRESH_BACKOFF_MAX = 1800
+# Sonda de alterações: revisão da planilha (1 chamada barata) consultada a cada N segundos;
+# a sincronização só roda quando ela muda, a pedido do webhook ou a cada REFRESH_INTERVALO
+PROBE_INTERVALO = float(os.environ.get('LEADS_PROBE_INTERVALO') or 5)
+# Webhook do Apps Script (desligado se a porta estiver vazia) e token esperado no cabeçalho;
+# sem token o webhook não sobe. Escuta só em localhost, a menos que LEADS_WEBHOOK_HOST diga outro endereço
+WEBHOOK_PORT = int(os.environ.get('LEADS_WEBHOOK_PORT') or 0)
+WEBHOOK_TOKEN = os.environ.get('LEADS_WEBHOOK_TOKEN') or None
+WEBHOOK_HOST = os.environ.get('LEADS_WEBHOOK_HOST') or '127.0.0.1'
+# Endpoint Prometheus /metrics (desligado se a porta estiver vazia), também só em localhost por padrão
+METRICS_PORT = int(os.environ.get('LEADS_METRICS_PORT') or 0)
+METRICS_HOST = os.environ.get('LEADS_METRICS_HOST') or '127.0.0.1'
+# Painel de tempos na sidebar: só por configuração do servidor, nunca por parâmetro da URL
+ADMIN_PAINEL = os.environ.get('LEADS_ADMIN', '') == '1'
+
+# Regras de tipo de imóvel por referência, em ordem de prioridade:
+# (regra, padrões em maiúsculas, tipo). Podem ser substituídas por um JSON.
+REGRAS_TIPO_IMOVEL = [
+    ('prefixo', ['CA'], 'Casa'),
+    ('prefixo', ['AP'], 'Apartamento'),
+    ('prefixo', ['TR'], 'Terreno'),
+    ('prefixo', ['CO'], 'Comercial'),
+    ('igual', ['WIND OCEANICA', 'TRESOR CAMBOINHAS'], 'Lançamento'),
+    ('contem', ['CASA'], 'Casa'),
+    ('contem', ['APARTAMENTO', 'APT'], 'Apartamento'),
+    ('contem', ['TERRENO'], 'Terreno'),
+    ('contem', ['COMERCIAL', 'LOJA', 'SALA'], 'Comercial'),
+    ('contem', ['LANÇAMENTO', 'LANCAMENTO'], 'Lançamento'),
+]
+REGRAS_TIPO_PATH = os.environ.get('LEADS_REGRAS_TIPO', os.path.join(RAIZ, 'regras_tipo_imovel.json'))
+
+# Linha do tempo: pontos máximos exibidos
+TIMELINE_MAX_PONTOS = 120
+
+# Tabela de dados detalhados
+COLUNAS_EXIBIR = [
+    'Data/Hora', 'Nome', 'Telefone', 'Imóvel/Referência',
+    'Interesse Visita', 'Tipo Imóvel', 'Status', 'Aba'
+]
+
+# Colunas de baixa cardinalidade armazenadas como category
+COLUNAS_CATEGORICAS = ['Tipo Imóvel', 'Status', 'Origem', 'Imóvel/Referência', 'Interesse Visita', 'Aba']
+
+# Referências com card próprio no dashboard (contadas também nos buckets diários, para os deltas)
+REFERENCIAS_DESTAQUE = ['Wind Oceanica', 'Tresor Camboinhas']
+
+# Dimensões do cubo de agregados, além de data e hora (Origem/Status só se existirem)
+CUBO_DIMENSOES = ['Tipo Imóvel', 'Origem', 'Status', 'Interesse_Bool']
+
+# Dimensões da tabela diária por referência, além da data (tipo e interesse para os filtros da página)
+REFERENCIAS_DIMENSOES = ['Imóvel/Referência', 'Tipo Imóvel', 'Interesse_Bool']
+
+# Nomes canônicos das colunas; cabeçalhos das abas são comparados sem acento/caixa/espaços
+COLUNAS_CANONICAS = ['Data/Hora', 'Nome', 'Telefone', 'Imóvel/Referência', 'Interesse Visita', 'Tipo Imóvel', 'Status', 'Origem']
+# Outros cabeçalhos aceitos para cada coluna canônica (comparados do mesmo jeito)
+ALIASES_COLUNAS = {
+    'Data/Hora': ['Data', 'Data e Hora', 'Data Hora', 'Carimbo de data/hora', 'Timestamp'],
+    'Nome': ['Nome Completo', 'Nome do Cliente', 'Cliente'],
+    'Telefone': ['Celular', 'WhatsApp', 'Fone', 'Tel'],
+    'Imóvel/Referência': ['Imóvel', 'Referência', 'Imóvel / Referência', 'Ref', 'Código do Imóvel'],
+    'Interesse Visita': ['Interesse', 'Interesse em Visita', 'Quer Visitar'],
+    'Tipo Imóvel': ['Tipo', 'Tipo de Imóvel'],
+}
+# Colunas sem as quais uma aba não é lida (conferidas no cabeçalho antes de baixar os dados)
+COLUNAS_OBRIGATORIAS = ['Data/Hora', 'Nome', 'Telefone', 'Imóvel/Referência']
+# Linhas repetidas entre abas (mesmo lead copiado) são descartadas por esta chave
+CHAVE_DUPLICIDADE = ['Telefone', 'Data/Hora']
+
+# Identidade do lead: telefones com código do país (55 + DDD + número) perdem o 55
+DDI_BRASIL = '55'
+TELEFONE_MIN_DIGITOS = 8
+# Contatos sem telefone só são reconhecidos pelo nome se ele tiver ao menos N palavras
+NOME_MIN_PALAVRAS = 2
+
+# Nomes que às vezes aparecem misturados na coluna de data
+NOMES_MISTURADOS = r'João|Maria|Guilherme|Teste'
+FORMATO_DATA = '%d/%m/%Y %H:%M:%S'
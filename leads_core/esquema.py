@@ -0,0 +1,78 @@
+"""
+ESQUEMA DAS ABAS - LUIS IMÓVEIS
+Cabeçalhos da planilha resolvidos para as colunas canônicas (acentos, caixa,
+espaços e aliases), validados pela primeira linha antes do download dos dados
+"""
+
+import unicodedata
+from functools import lru_cache
+
+from .config import ALIASES_COLUNAS, COLUNAS_CANONICAS, COLUNAS_OBRIGATORIAS
+
+class SchemaError(ValueError):
+    """Aba sem alguma coluna obrigatória (cabeçalho renomeado ou removido na planilha)"""
+    
+    def __init__(self, titulo, faltando, headers):
+        self.titulo = titulo
+        self.faltando = list(faltando)
+        self.headers = list(headers)
+        super().__init__(
+            f"Aba '{titulo}' sem a(s) coluna(s) obrigatória(s) {', '.join(self.faltando)}; "
+            f"cabeçalho encontrado: {' | '.join(map(str, self.headers)) or '(vazio)'}"
+        )
+
+def normalize_header(nome):
+    """Chave de comparação de cabeçalho: sem acentos, sem caixa e com espaços simples"""
+    sem_acento = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sem_acento.casefold().split())
+
+# Chave normalizada -> coluna canônica; o nome canônico tem prioridade sobre os aliases
+_CANONICOS = {normalize_header(col): col for col in COLUNAS_CANONICAS}
+_ALIASES = {normalize_header(alias): col for col, aliases in ALIASES_COLUNAS.items() for alias in aliases}
+
+def normalize_headers(headers):
+    """Troca cabeçalhos equivalentes pelo nome canônico (os demais só perdem espaços extras)
+    
+    Cada coluna canônica fica com um único cabeçalho: primeiro os que já são o
+    nome canônico, depois os aliases. Todo nome sai único (o Parquet do snapshot
+    recusa colunas repetidas): cabeçalho vazio vira "Coluna N" e repetições
+    ficam com o sufixo "(repetida)", numerado a partir da segunda.
+    """
+    chaves = [normalize_header(h) for h in headers]
+    resolvidos = [' '.join(str(h).split()) for h in headers]
+    atribuidos, usadas = set(), set()
+    for tabela in (_CANONICOS, _ALIASES):
+        for posicao, chave in enumerate(chaves):
+            coluna = tabela.get(chave)
+            if coluna is not None and coluna not in usadas and posicao not in atribuidos:
+                resolvidos[posicao] = coluna
+                atribuidos.add(posicao)
+                usadas.add(coluna)
+    # Repetição de um nome já usado não pode ficar igual (df[coluna] viraria um DataFrame)
+    for posicao, nome in enumerate(resolvidos):
+        if posicao in atribuidos:
+            continue
+        base = nome or f"Coluna {posicao + 1}"
+        nome, repeticao = base, 0
+        while nome in usadas:
+            repeticao += 1
+            nome = f"{base} (repetida)" if repeticao == 1 else f"{base} (repetida {repeticao})"
+        resolvidos[posicao] = nome
+        usadas.add(nome)
+    return resolvidos
+
+@lru_cache(maxsize=64)
+def _resolve(titulo, headers):
+    colunas = normalize_headers(headers)
+    faltando = [col for col in COLUNAS_OBRIGATORIAS if col not in colunas]
+    if faltando:
+        raise SchemaError(titulo, faltando, headers)
+    return tuple(colunas)
+
+def resolve_schema(titulo, headers):
+    """Colunas canônicas do cabeçalho de uma aba; SchemaError se faltar coluna obrigatória
+    
+    O mapeamento fica em cache por aba e cabeçalho: as sincronizações seguintes
+    com o mesmo cabeçalho não resolvem de novo.
+    """
+    return list(_resolve(titulo, tuple(headers)))
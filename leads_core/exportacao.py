@@ -0,0 +1,118 @@
+"""
+EXPORTAÇÃO DE LEADS - LUIS IMÓVEIS
+Gravação em lotes (CSV, CSV gzip ou Parquet) direto dos dados colunares,
+sem montar o arquivo inteiro em memória
+"""
+
+import gzip
+import io
+import os
+import tempfile
+
+# formato -> (extensão, mime)
+FORMATOS_EXPORTACAO = {
+    'csv': ('.csv', 'text/csv'),
+    'csv.gz': ('.csv.gz', 'application/gzip'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+EXPORTACAO_LOTE = 50_000
+FORMATO_DATA_EXPORTACAO = '%d/%m/%Y %H:%M'
+
+def iter_lotes(df, colunas=None, tamanho_lote=EXPORTACAO_LOTE):
+    """Fatias consecutivas do DataFrame (ou LeadsView), só com as colunas pedidas"""
+    colunas_lote = None if colunas is None else [col for col in colunas if col in df.columns]
+    
+    for inicio in range(0, len(df), tamanho_lote):
+        lote = df.iloc[inicio:inicio + tamanho_lote]
+        yield lote if colunas_lote is None else lote[colunas_lote]
+
+def _formatar_lote_texto(lote):
+    """Data/Hora como texto, igual à tabela (só no lote corrente)"""
+    if 'Data/Hora' not in lote.columns or not hasattr(lote['Data/Hora'], 'dt'):
+        return lote
+    
+    lote = lote.copy()
+    lote['Data/Hora'] = lote['Data/Hora'].dt.strftime(FORMATO_DATA_EXPORTACAO)
+    return lote
+
+def _write_csv(df, saida, colunas, tamanho_lote):
+    """CSV em lotes sobre um arquivo binário"""
+    texto = io.TextIOWrapper(saida, encoding='utf-8', newline='')
+    try:
+        cabecalho = True
+        for lote in iter_lotes(df, colunas, tamanho_lote):
+            _formatar_lote_texto(lote).to_csv(texto, header=cabecalho, index=False)
+            cabecalho = False
+    
+        # Frame vazio: ainda assim escrever o cabeçalho
+        if cabecalho:
+            colunas_saida = df.columns if colunas is None else [col for col in colunas if col in df.columns]
+            df[list(colunas_saida)].to_csv(texto, index=False)
+    
+        texto.flush()
+    finally:
+        # Não fechar o arquivo de baixo junto com o wrapper
+        texto.detach()
+
+def _write_parquet(df, saida, colunas, tamanho_lote):
+    """Parquet com um row group por lote, mantendo os tipos originais"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    writer = None
+    try:
+        for lote in iter_lotes(df, colunas, tamanho_lote):
+            tabela = pa.Table.from_pandas(lote, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(saida, tabela.schema, compression='zstd')
+            writer.write_table(tabela.cast(writer.schema))
+    
+        if writer is None:
+            colunas_saida = df.columns if colunas is None else [col for col in colunas if col in df.columns]
+            pq.write_table(pa.Table.from_pandas(df[list(colunas_saida)], preserve_index=False), saida)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def export_leads(df, destino, formato='csv', colunas=None, tamanho_lote=EXPORTACAO_LOTE):
+    """Grava os leads em `destino` (caminho ou arquivo binário aberto) em lotes"""
+    if formato not in FORMATOS_EXPORTACAO:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, 'wb') as arquivo:
+            export_leads(df, arquivo, formato, colunas, tamanho_lote)
+        return
+    
+    if formato == 'parquet':
+        _write_parquet(df, destino, colunas, tamanho_lote)
+    elif formato == 'csv.gz':
+        # mtime fixo: mesmo conteúdo gera o mesmo arquivo
+        with gzip.GzipFile(fileobj=destino, mode='wb', compresslevel=6, mtime=0) as comprimido:
+            _write_csv(df, comprimido, colunas, tamanho_lote)
+    else:
+        _write_csv(df, destino, colunas, tamanho_lote)
+
+def export_to_tempfile(df, formato='csv', colunas=None, diretorio=None, tamanho_lote=EXPORTACAO_LOTE):
+    """Exporta para um arquivo temporário e devolve o caminho (quem chama remove)"""
+    extensao, _ = FORMATOS_EXPORTACAO[formato]
+    descritor, caminho = tempfile.mkstemp(prefix='leads_', suffix=extensao, dir=diretorio)
+    
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            export_leads(df, arquivo, formato, colunas, tamanho_lote)
+    except BaseException:
+        os.remove(caminho)
+        raise
+    
+    return caminho
+
+def export_bytes(df, formato='csv', colunas=None, tamanho_lote=EXPORTACAO_LOTE):
+    """Conteúdo exportado, montado via arquivo temporário (para o st.download_button)"""
+    caminho = export_to_tempfile(df, formato, colunas, tamanho_lote=tamanho_lote)
+    try:
+        with open(caminho, 'rb') as arquivo:
+            return arquivo.read()
+    finally:
+        os.remove(caminho)
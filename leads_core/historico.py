@@ -0,0 +1,192 @@
+"""
+HISTÓRICO DE LEADS - LUIS IMÓVEIS
+Cópia local (SQLite) de todos os leads já sincronizados, para consultas de
+longo prazo sem carregar a planilha inteira em memória
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import timedelta
+
+import pandas as pd
+
+from . import config
+from .telemetria import span
+
+# Colunas do DataFrame de leads -> colunas da tabela
+COLUNAS_HISTORICO = {
+    'Nome': 'nome',
+    'Telefone': 'telefone',
+    'Imóvel/Referência': 'referencia',
+    'Tipo Imóvel': 'tipo',
+    'Origem': 'origem',
+    'Status': 'status',
+    'Aba': 'aba',
+    'Lead_ID': 'lead_id',
+}
+
+# Dimensões aceitas em aggregate() -> expressão SQL
+DIMENSOES_SQL = {
+    'Ano': 'ano',
+    'Mês': 'mes',
+    'Hora': 'hora',
+    'Data': 'substr(data_hora, 1, 10)',
+    'Tipo Imóvel': 'tipo',
+    'Imóvel/Referência': 'referencia',
+    'Origem': 'origem',
+    'Status': 'status',
+    'Aba': 'aba',
+}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS leads (
+    chave TEXT PRIMARY KEY,
+    data_hora TEXT,  -- ISO 8601 no fuso de TIMEZONE
+    ano INTEGER,
+    mes INTEGER,
+    hora INTEGER,
+    nome TEXT,
+    telefone INTEGER,
+    referencia TEXT,
+    tipo TEXT,
+    origem TEXT,
+    status TEXT,
+    aba TEXT,
+    lead_id INTEGER,
+    interesse INTEGER NOT NULL DEFAULT 0,
+    primeiro_contato INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_leads_data_hora ON leads (data_hora);
+CREATE INDEX IF NOT EXISTS idx_leads_tipo ON leads (tipo, data_hora);
+CREATE INDEX IF NOT EXISTS idx_leads_referencia ON leads (referencia, data_hora);
+"""
+
+# Linhas editadas na planilha atualizam o histórico; linhas removidas continuam nele
+UPSERT = """
+INSERT INTO leads (chave, data_hora, ano, mes, hora, nome, telefone, referencia, tipo,
+                   origem, status, aba, lead_id, interesse, primeiro_contato)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (chave) DO UPDATE SET
+    tipo = excluded.tipo, origem = excluded.origem, status = excluded.status,
+    lead_id = excluded.lead_id, interesse = excluded.interesse,
+    primeiro_contato = excluded.primeiro_contato
+"""
+
+def _as_object(serie):
+    """Valores Python (None onde vazio), aceitos diretamente pelo sqlite3"""
+    serie = serie.astype(object)
+    return serie.where(serie.notna(), None)
+
+def history_rows(df):
+    """Tuplas prontas para o UPSERT, montadas por coluna (sem iterar o DataFrame)"""
+    vazia = pd.Series(None, index=df.index, dtype=object)
+    if 'Data/Hora' in df.columns:
+        datas = df['Data/Hora'].dt.tz_convert(config.TIMEZONE)
+        # ISO 8601 no horário local ('2025-03-01T14:05:00'): ordena como texto e é bem mais rápido que strftime
+        locais = datas.dt.tz_localize(None).to_numpy(dtype='datetime64[s]')
+        texto_data = _as_object(pd.Series(locais.astype(str), index=df.index).where(datas.notna()))
+        ano, mes, hora = (_as_object(parte.astype('Int64')) for parte in (datas.dt.year, datas.dt.month, datas.dt.hour))
+    else:
+        texto_data = ano = mes = hora = vazia
+    
+    colunas = {
+        destino: _as_object(df[origem]) if origem in df.columns else vazia
+        for origem, destino in COLUNAS_HISTORICO.items()
+    }
+    # Mesma linha da planilha => mesma chave, em qualquer sincronização
+    chave = (
+        texto_data.fillna('') + '|' + colunas['telefone'].astype(str) + '|' +
+        colunas['nome'].astype(str) + '|' + colunas['referencia'].astype(str) + '|' + colunas['aba'].astype(str)
+    )
+    interesse = _as_object(df['Interesse_Bool'].astype(int)) if 'Interesse_Bool' in df.columns else 0
+    primeiro = _as_object(df['Primeiro_Contato'].astype(int)) if 'Primeiro_Contato' in df.columns else 0
+    
+    tabela = pd.DataFrame({
+        'chave': chave, 'data_hora': texto_data, 'ano': ano, 'mes': mes, 'hora': hora,
+        **colunas, 'interesse': interesse, 'primeiro_contato': primeiro,
+    })
+    return list(tabela.itertuples(index=False, name=None))
+
+class LeadsHistory:
+    """Histórico de leads em SQLite, alimentado a cada sincronização
+    
+    Guarda todas as linhas já vistas (inclusive as que saírem da planilha) e
+    responde filtros e agregações por SQL, com índices em data/hora, tipo e
+    referência. Uma conexão por operação: a thread de fundo grava e as
+    sessões leem ao mesmo tempo (modo WAL).
+    """
+    
+    def __init__(self, caminho=None):
+        self.caminho = caminho or config.HISTORICO_PATH
+        self._lock = threading.Lock()  # uma gravação por vez
+        self._pronto = False
+    
+    def _connect(self):
+        if not self._pronto:
+            os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+            with closing(sqlite3.connect(self.caminho)) as conexao:
+                conexao.execute('PRAGMA journal_mode=WAL')
+                conexao.executescript(ESQUEMA)
+            self._pronto = True
+        return closing(sqlite3.connect(self.caminho, timeout=30))
+    
+    def count(self):
+        """Total de linhas no histórico"""
+        with self._connect() as conexao:
+            return conexao.execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+    
+    def mirror(self, df):
+        """Grava (ou atualiza) as linhas de `df` no histórico; retorna quantas foram enviadas"""
+        if df.empty:
+            return 0
+    
+        with span('historico.gravar', linhas=len(df)):
+            linhas = history_rows(df)
+            with self._lock, self._connect() as conexao, conexao:
+                conexao.executemany(UPSERT, linhas)
+        return len(linhas)
+    
+    def _where(self, periodo, tipo, interesse):
+        """Cláusula WHERE e parâmetros dos mesmos filtros da sidebar"""
+        condicoes, parametros = [], []
+        if periodo is not None:
+            condicoes.append('data_hora >= ? AND data_hora < ?')
+            parametros += [f'{periodo[0]:%Y-%m-%d}', f'{periodo[1] + timedelta(days=1):%Y-%m-%d}']
+        if tipo != 'Todos':
+            condicoes.append('tipo = ?')
+            parametros.append(tipo)
+        if interesse == "Apenas com interesse":
+            condicoes.append('interesse = 1')
+        elif interesse == "Apenas sem interesse":
+            condicoes.append('interesse = 0')
+        return (' WHERE ' + ' AND '.join(condicoes)) if condicoes else '', parametros
+    
+    def aggregate(self, dimensoes, periodo=None, tipo='Todos', interesse='Todos'):
+        """Leads, leads com interesse e primeiros contatos por dimensão, calculados no SQLite"""
+        expressoes = [f'{DIMENSOES_SQL[dim]} AS "{dim}"' for dim in dimensoes]
+        where, parametros = self._where(periodo, tipo, interesse)
+        sql = (
+            f"SELECT {', '.join(expressoes)}, COUNT(*) AS Leads, SUM(interesse) AS Com_Interesse, "
+            f"SUM(primeiro_contato) AS Primeiros_Contatos FROM leads{where}"
+        )
+        if dimensoes:
+            posicoes = ', '.join(str(i + 1) for i in range(len(dimensoes)))
+            sql += f' GROUP BY {posicoes} ORDER BY {posicoes}'
+    
+        with span('historico.consultar', dimensoes=','.join(dimensoes)) as medida:
+            with self._connect() as conexao:
+                resultado = pd.read_sql_query(sql, conexao, params=parametros)
+            medida['linhas'] = len(resultado)
+        return resultado
+    
+    def date_range(self):
+        """(primeira, última) data/hora do histórico, como texto; (None, None) se vazio"""
+        with self._connect() as conexao:
+            return conexao.execute('SELECT MIN(data_hora), MAX(data_hora) FROM leads').fetchone()
+    
+    def year_comparison(self, tipo='Todos', interesse='Todos'):
+        """Leads por ano e mês (todas as datas do histórico), para comparar anos"""
+        comparacao = self.aggregate(['Ano', 'Mês'], None, tipo, interesse)
+        return comparacao.dropna(subset=['Ano', 'Mês']).astype({'Ano': int, 'Mês': int})
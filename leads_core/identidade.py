@@ -0,0 +1,232 @@
+"""
+IDENTIDADE DE LEADS - LUIS IMÓVEIS
+Índice telefone/nome -> Lead_ID, mantido incrementalmente a cada lote novo
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .config import DDI_BRASIL, NOME_MIN_PALAVRAS, TELEFONE_MIN_DIGITOS
+from .telemetria import span
+
+def phone_identity(telefones):
+    """Telefone normalizado para identidade: só dígitos, sem o código do país (nulo se curto demais)"""
+    digitos = telefones.astype('string')
+    com_ddi = digitos.str.len().isin([12, 13]) & digitos.str.startswith(DDI_BRASIL)
+    digitos = digitos.mask(com_ddi, digitos.str[len(DDI_BRASIL):])
+    digitos = digitos.where(digitos.str.len() >= TELEFONE_MIN_DIGITOS)
+    return pd.to_numeric(digitos, errors='coerce').astype('Int64')
+
+def name_identity(nomes):
+    """Nome normalizado para identidade: sem acentos, caixa, pontuação ou espaços extras"""
+    texto = (
+        nomes.astype('string').fillna('')
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        .str.casefold()
+        .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+        .str.strip()
+    )
+    return texto.mask(texto == '')
+
+def fallback_names(nomes):
+    """Nomes normalizados aceitos como identidade sem telefone: só os com NOME_MIN_PALAVRAS palavras ou mais
+    
+    Um primeiro nome sozinho ("maria") é comum demais para identificar uma pessoa.
+    """
+    return nomes.where(nomes.str.count(' ') + 1 >= NOME_MIN_PALAVRAS)
+
+class LeadIdentityIndex:
+    """Índice hash de identidade: telefone normalizado (ou nome, sem telefone) -> Lead_ID
+    
+    Cada lote novo custa O(linhas novas): as chaves do lote são fatoradas e só
+    as distintas passam pelos dicionários. O nome (normalizado, com pelo menos
+    NOME_MIN_PALAVRAS palavras) só identifica contatos sem telefone: eles caem
+    no lead do telefone com que esse nome já apareceu, a menos que o nome
+    tenha aparecido com mais de um telefone (pessoas diferentes, mesmo nome).
+    
+    Dentro de transaction() cada entrada nova é anotada e desfeita se o bloco
+    falhar: um lote cuja gravação falhou não fica registrado como já visto.
+    """
+    
+    def __init__(self):
+        self._telefones = {}
+        self._nomes = {}  # nome -> lead criado só pelo nome (contatos sem telefone)
+        self._nomes_telefone = {}  # nome -> lead do telefone com que o nome apareceu
+        self._nomes_ambiguos = set()  # nomes vistos com mais de um telefone
+        self._proximo = 0
+        self._desfazer = None  # entradas criadas na transação aberta
+    
+    def __len__(self):
+        return self._proximo
+    
+    @classmethod
+    def from_frame(cls, df):
+        """Reconstrói o índice a partir de leads que já têm Lead_ID (ex.: snapshot lido do disco)"""
+        indice = cls()
+        if df.empty or 'Lead_ID' not in df.columns:
+            return indice
+        
+        ids = df['Lead_ID']
+        telefones = phone_identity(df['Telefone'])
+        nomes = fallback_names(name_identity(df['Nome']))
+        com_telefone = telefones.notna()
+        
+        pares = pd.DataFrame({'chave': telefones, 'id': ids}).dropna().drop_duplicates('chave')
+        indice._telefones.update(zip(pares['chave'].tolist(), pares['id'].tolist()))
+        indice._register_phone_names(nomes[com_telefone], ids[com_telefone])
+        
+        # Leads criados só pelo nome: os sem telefone que não caíram no lead de um telefone
+        sem_telefone = ~com_telefone & ~ids.isin(pares['id'])
+        pares = pd.DataFrame({'chave': nomes[sem_telefone], 'id': ids[sem_telefone]}).dropna().drop_duplicates('chave')
+        indice._nomes.update(zip(pares['chave'].tolist(), pares['id'].tolist()))
+        
+        indice._proximo = int(ids.max()) + 1 if ids.notna().any() else 0
+        return indice
+    
+    @contextmanager
+    def transaction(self):
+        """Bloco cujas identidades novas são desfeitas se ele levantar exceção"""
+        proximo, self._desfazer = self._proximo, []
+        try:
+            yield self
+        except BaseException:
+            for registro, chave in reversed(self._desfazer):
+                if isinstance(registro, set):
+                    registro.discard(chave)
+                else:
+                    del registro[chave]
+            self._proximo = proximo
+            raise
+        finally:
+            self._desfazer = None
+    
+    def _add(self, registro, chave, valor=None):
+        """Entrada nova em um dicionário (ou conjunto) do índice, anotada na transação aberta"""
+        if isinstance(registro, set):
+            registro.add(chave)
+        else:
+            registro[chave] = valor
+        if self._desfazer is not None:
+            self._desfazer.append((registro, chave))
+    
+    def _novo_id(self):
+        lead_id = self._proximo
+        self._proximo += 1
+        return lead_id
+    
+    def _resolver(self, chaves, registro):
+        """Lead_ID por chave distinta (criando os que faltam); devolve (ids, criados)"""
+        ids = np.empty(len(chaves), dtype='int64')
+        criados = np.zeros(len(chaves), dtype=bool)
+        
+        for i, chave in enumerate(chaves):
+            lead_id = registro.get(chave)
+            if lead_id is None:
+                lead_id = self._novo_id()
+                self._add(registro, chave, lead_id)
+                criados[i] = True
+            ids[i] = lead_id
+        
+        return ids, criados
+    
+    def _register_phone_names(self, nomes, ids):
+        """Guarda o lead de cada nome visto com telefone; nome com dois leads vira ambíguo"""
+        pares = pd.DataFrame({'nome': np.asarray(nomes, dtype=object), 'id': np.asarray(ids)}).dropna().drop_duplicates()
+        for nome, lead_id in zip(pares['nome'].tolist(), pares['id'].tolist()):
+            anterior = self._nomes_telefone.get(nome)
+            if anterior is None:
+                self._add(self._nomes_telefone, nome, lead_id)
+            elif anterior != lead_id and nome not in self._nomes_ambiguos:
+                self._add(self._nomes_ambiguos, nome)
+    
+    def _resolve_names(self, nomes):
+        """Lead_ID por nome distinto de contatos sem telefone; devolve (ids, criados)"""
+        ids = np.empty(len(nomes), dtype='int64')
+        criados = np.zeros(len(nomes), dtype=bool)
+        
+        for i, nome in enumerate(nomes):
+            lead_id = self._nomes.get(nome)
+            if lead_id is None and nome not in self._nomes_ambiguos:
+                lead_id = self._nomes_telefone.get(nome)
+            if lead_id is None:
+                lead_id = self._novo_id()
+                self._add(self._nomes, nome, lead_id)
+                criados[i] = True
+            ids[i] = lead_id
+        
+        return ids, criados
+    
+    def assign(self, df):
+        """Lead_ID e indicador de primeiro contato para um lote de linhas novas"""
+        ids = np.empty(len(df), dtype='int64')
+        primeiro = np.zeros(len(df), dtype=bool)
+        if df.empty:
+            return ids, primeiro
+        
+        telefones = phone_identity(df['Telefone']).to_numpy(dtype='float64', na_value=np.nan)
+        nomes = fallback_names(name_identity(df['Nome']))
+        com_telefone = ~np.isnan(telefones)
+        
+        # 1) Telefone: a chave principal
+        codigos, unicos = pd.factorize(telefones[com_telefone])
+        ids_unicos, criados = self._resolver(unicos.astype('int64').tolist(), self._telefones)
+        ids[com_telefone] = ids_unicos[codigos]
+        primeiro[com_telefone] = criados[codigos]
+        
+        # Nomes vistos com telefone passam a apontar para o lead do telefone (se for um só)
+        self._register_phone_names(nomes[com_telefone], ids[com_telefone])
+        
+        # 2) Sem telefone: nome normalizado
+        sem_telefone = ~com_telefone & nomes.notna().to_numpy()
+        codigos, unicos = pd.factorize(nomes[sem_telefone].to_numpy())
+        ids_unicos, criados = self._resolve_names(unicos.tolist())
+        ids[sem_telefone] = ids_unicos[codigos]
+        primeiro[sem_telefone] = criados[codigos]
+        
+        # 3) Sem chave alguma (nem telefone, nem nome completo): cada linha é um lead
+        anonimas = ~com_telefone & ~sem_telefone
+        ids[anonimas] = [self._novo_id() for _ in range(int(anonimas.sum()))]
+        primeiro[anonimas] = True
+        
+        # Só a primeira linha de cada lead criado neste lote é o primeiro contato
+        primeiro &= ~pd.Series(ids).duplicated().to_numpy()
+        return ids, primeiro
+
+def assign_lead_ids(df, identidades):
+    """Preenche Lead_ID/Primeiro_Contato das linhas que ainda não têm (as recém-chegadas)"""
+    if df.empty:
+        return df
+    
+    if 'Lead_ID' not in df.columns:
+        df['Lead_ID'] = pd.array([pd.NA] * len(df), dtype='Int64')
+        df['Primeiro_Contato'] = False
+    df['Lead_ID'] = df['Lead_ID'].astype('Int64')
+    df['Primeiro_Contato'] = df['Primeiro_Contato'].astype('boolean').fillna(False).astype(bool)
+    
+    novas = df['Lead_ID'].isna().to_numpy()
+    if novas.any():
+        with span('identidade', linhas=int(novas.sum())):
+            ids, primeiro = identidades.assign(df[novas])
+        df.loc[novas, 'Lead_ID'] = ids
+        df.loc[novas, 'Primeiro_Contato'] = primeiro
+    
+    return df
+
+def mark_first_contacts(df):
+    """Primeiro contato pela data (não pela ordem de chegada), recalculado na leitura completa"""
+    if df.empty:
+        return df
+    
+    ordem = df['Data/Hora'].sort_values(kind='stable', na_position='last').index
+    df['Primeiro_Contato'] = ~df.loc[ordem, 'Lead_ID'].duplicated().reindex(df.index)
+    return df
+
+def lead_identity_stats(df):
+    """Leads únicos e contatos repetidos (linhas além do primeiro contato de cada lead)"""
+    if df.empty or 'Lead_ID' not in df.columns:
+        return len(df), 0
+    
+    unicos = int(df['Lead_ID'].nunique())
+    return unicos, len(df) - unicos
@@ -0,0 +1,68 @@
+"""
+CLIENTE GOOGLE SHEETS - LUIS IMÓVEIS
+Sessão autenticada de longa duração, reutilizada entre atualizações
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+import gspread
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Renovar o token com folga, antes que uma leitura encontre o token expirado
+TOKEN_MARGEM = timedelta(minutes=10)
+
+class SheetsClient:
+    """Cliente gspread reutilizável
+
+    Autentica uma única vez e mantém a AuthorizedSession do gspread (conexões
+    HTTP keep-alive). O token é renovado proativamente e a lista de abas fica
+    memorizada, então cada atualização custa apenas a leitura dos valores.
+    """
+
+    def __init__(self, creds_info, planilha_id, worksheet_names, scopes=SCOPES):
+        self.planilha_id = planilha_id
+        self.worksheet_names = list(worksheet_names)
+        self._creds = Credentials.from_service_account_info(creds_info, scopes=scopes)
+        self._client = gspread.authorize(self._creds)
+        # Transporte próprio (com sessão própria) só para renovar o token (a AuthorizedSession injeta o próprio token)
+        self._token_request = Request()
+        self._worksheets = None
+        self._lock = threading.Lock()
+
+    def _ensure_token(self):
+        """Renova o token se estiver inválido ou perto de expirar"""
+        expiry = self._creds.expiry  # UTC sem timezone, como no google-auth
+        if not self._creds.valid or expiry is None or expiry - datetime.now(timezone.utc).replace(tzinfo=None) < TOKEN_MARGEM:
+            self._creds.refresh(self._token_request)
+
+    def _resolve_worksheets(self):
+        """Abre a planilha e lista as abas de leads existentes, na ordem configurada"""
+        sheet = self._client.open_by_key(self.planilha_id)
+        titulos = {ws.title: ws for ws in sheet.worksheets()}
+        
+        return [titulos[name] for name in self.worksheet_names if name in titulos]
+
+    def worksheets(self):
+        """Abas de leads, resolvidas na primeira chamada e reutilizadas depois"""
+        with self._lock:
+            self._ensure_token()
+            if self._worksheets is None:
+                self._worksheets = self._resolve_worksheets()
+            return self._worksheets
+
+    def worksheet(self):
+        """Primeira aba de leads encontrada (None se nenhuma existir)"""
+        abas = self.worksheets()
+        return abas[0] if abas else None
+
+    def invalidate(self):
+        """Esquece as abas memorizadas (ex.: aba renomeada, removida ou criada)"""
+        with self._lock:
+            self._worksheets = None
@@ -0,0 +1,67 @@
+"""
+TABELA DE LEADS - LUIS IMÓVEIS
+Busca, ordenação e formatação da tabela detalhada (sem dependência de interface)
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from .config import COLUNAS_EXIBIR
+
+def search_leads(df, termo):
+    """Linhas cujo Nome, Telefone ou Referência contém o termo buscado"""
+    termo = termo.strip()
+    if not termo:
+        return df
+    
+    mask = np.zeros(len(df), dtype=bool)
+    
+    if 'Nome' in df.columns:
+        mask |= df['Nome'].astype(str).str.contains(termo, case=False, regex=False).to_numpy(dtype=bool)
+    
+    # Telefone só é buscado quando o termo parece um número
+    digitos = re.sub(r'\D', '', termo)
+    if digitos and re.fullmatch(r'[\d\s()+.-]+', termo) and 'Telefone' in df.columns:
+        telefones = df['Telefone'].astype('string').str.contains(digitos, regex=False)
+        mask |= telefones.fillna(False).to_numpy(dtype=bool)
+    
+    if 'Imóvel/Referência' in df.columns:
+        # Busca nas categorias (poucas) e depois compara os códigos
+        refs = df['Imóvel/Referência']
+        categorias = refs.cat.categories
+        encontradas = categorias[categorias.astype(str).str.contains(termo, case=False, regex=False)]
+        mask |= refs.isin(encontradas).to_numpy(dtype=bool)
+    
+    return df[mask]
+
+def _sort_key(serie):
+    """Chave de ordenação; categorias são ordenadas pelo texto, não pela ordem de inclusão"""
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie
+    
+    posicao = serie.cat.categories.astype(str).argsort().argsort()
+    codigos = serie.cat.codes.to_numpy()
+    return pd.Series(np.where(codigos >= 0, posicao[codigos], -1), index=serie.index)
+
+def sort_leads(df, coluna, crescente=True):
+    """Ordena os leads por uma coluna (estável, vazios no final)
+    
+    Só a coluna ordenada é lida; o resultado sai por posição (DataFrame.take
+    ou LeadsView.take), sem reordenar as demais colunas antes da paginação.
+    """
+    serie = df[coluna].reset_index(drop=True)
+    ordem = serie.sort_values(ascending=crescente, kind='stable', na_position='last', key=_sort_key).index
+    return df.take(ordem.to_numpy())
+
+def format_leads_for_display(df):
+    """Colunas de exibição com a data formatada (chamar só na fatia exibida ou exportada)"""
+    colunas_disponiveis = [col for col in COLUNAS_EXIBIR if col in df.columns]
+    df_display = df[colunas_disponiveis].copy()
+    
+    # Formatar data
+    if 'Data/Hora' in df_display.columns:
+        df_display['Data/Hora'] = df_display['Data/Hora'].dt.strftime('%d/%m/%Y %H:%M')
+    
+    return df_display
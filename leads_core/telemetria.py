@@ -0,0 +1,168 @@
+"""
+TELEMETRIA - LUIS IMÓVEIS
+Spans de tempo leves para o caminho carga → limpeza → filtros → gráficos,
+com logs JSON estruturados e exposição no formato texto do Prometheus
+"""
+
+import functools
+import json
+import logging
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('telemetria')
+
+# Durações mantidas por span para os percentis (janela deslizante)
+TELEMETRIA_AMOSTRAS = 500
+QUANTIS = (0.5, 0.95, 0.99)
+
+def _quantile(valores, q):
+    """Quantil por posição (nearest-rank) de uma lista já ordenada"""
+    if not valores:
+        return 0.0
+    posicao = min(len(valores) - 1, max(0, math.ceil(q * len(valores)) - 1))
+    return valores[posicao]
+
+class Telemetry:
+    """Registro thread-safe de spans: durações recentes, totais e atributos do último span
+    
+    Atributos numéricos (linhas, bytes) são somados; 'cache' conta acertos e
+    faltas por span.
+    """
+    
+    def __init__(self, amostras=TELEMETRIA_AMOSTRAS):
+        self._lock = threading.Lock()
+        self._duracoes = defaultdict(lambda: deque(maxlen=amostras))
+        self._contagem = defaultdict(int)
+        self._soma = defaultdict(float)
+        self._cache = defaultdict(lambda: {'hit': 0, 'miss': 0})
+        self._totais = defaultdict(lambda: defaultdict(float))
+        self._ultimo = {}
+    
+    def record(self, nome, segundos, **atributos):
+        """Registra um span já medido e emite o log JSON correspondente"""
+        with self._lock:
+            self._duracoes[nome].append(segundos)
+            self._contagem[nome] += 1
+            self._soma[nome] += segundos
+            self._ultimo[nome] = atributos
+            for chave, valor in atributos.items():
+                if chave == 'cache':
+                    self._cache[nome][valor] += 1
+                elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                    self._totais[nome][chave] += valor
+    
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(
+                {'span': nome, 'ms': round(segundos * 1000, 3), **atributos},
+                ensure_ascii=False, default=str
+            ))
+    
+    def cache_event(self, nome, acerto):
+        """Conta um acerto/falta de cache sem medir tempo"""
+        with self._lock:
+            self._cache[nome]['hit' if acerto else 'miss'] += 1
+    
+    @contextmanager
+    def span(self, nome, **atributos):
+        """Mede o bloco; o dicionário devolvido aceita atributos extras (linhas, bytes, cache)"""
+        inicio = time.perf_counter()
+        try:
+            yield atributos
+        finally:
+            self.record(nome, time.perf_counter() - inicio, **atributos)
+    
+    def timed(self, nome=None):
+        """Decorador: cada chamada da função vira um span"""
+        def decorar(funcao):
+            rotulo = nome or funcao.__name__
+    
+            @functools.wraps(funcao)
+            def medida(*args, **kwargs):
+                with self.span(rotulo):
+                    return funcao(*args, **kwargs)
+            return medida
+        return decorar
+    
+    def summary(self):
+        """Uma linha por span: chamadas, p50/p95/máximo (ms), cache e último atributo"""
+        with self._lock:
+            nomes = sorted(set(self._contagem) | set(self._cache))
+            linhas = []
+            for nome in nomes:
+                duracoes = sorted(self._duracoes.get(nome, ()))
+                cache = self._cache.get(nome, {'hit': 0, 'miss': 0})
+                linhas.append({
+                    'span': nome,
+                    'chamadas': self._contagem.get(nome, 0),
+                    'p50_ms': round(_quantile(duracoes, 0.5) * 1000, 2),
+                    'p95_ms': round(_quantile(duracoes, 0.95) * 1000, 2),
+                    'max_ms': round(max(duracoes, default=0.0) * 1000, 2),
+                    'cache_hit': cache['hit'],
+                    'cache_miss': cache['miss'],
+                    'ultimo': dict(self._ultimo.get(nome, {})),
+                })
+        return linhas
+    
+    def prometheus_text(self):
+        """Métricas no formato de exposição texto do Prometheus"""
+        saida = [
+            '# HELP leads_span_seconds Duração dos spans do dashboard (janela recente)',
+            '# TYPE leads_span_seconds summary',
+        ]
+        with self._lock:
+            for nome in sorted(self._contagem):
+                duracoes = sorted(self._duracoes[nome])
+                for q in QUANTIS:
+                    saida.append(f'leads_span_seconds{{span="{nome}",quantile="{q}"}} {_quantile(duracoes, q):.6f}')
+                saida.append(f'leads_span_seconds_sum{{span="{nome}"}} {self._soma[nome]:.6f}')
+                saida.append(f'leads_span_seconds_count{{span="{nome}"}} {self._contagem[nome]}')
+    
+            saida.append('# HELP leads_cache_total Acertos e faltas de cache por span')
+            saida.append('# TYPE leads_cache_total counter')
+            for nome in sorted(self._cache):
+                for resultado, total in self._cache[nome].items():
+                    saida.append(f'leads_cache_total{{span="{nome}",resultado="{resultado}"}} {total}')
+    
+            saida.append('# HELP leads_span_total Soma dos atributos numéricos por span (linhas, bytes)')
+            saida.append('# TYPE leads_span_total counter')
+            for nome in sorted(self._totais):
+                for chave, total in sorted(self._totais[nome].items()):
+                    saida.append(f'leads_span_total{{span="{nome}",atributo="{chave}"}} {total:g}')
+    
+        return '\n'.join(saida) + '\n'
+
+# Registro único do processo
+TELEMETRIA = Telemetry()
+span = TELEMETRIA.span
+timed = TELEMETRIA.timed
+
+def start_metrics_server(porta, telemetria=TELEMETRIA, host='127.0.0.1'):
+    """Serve /metrics (texto Prometheus) em uma thread de fundo; devolve o servidor
+    
+    Escuta só em localhost por padrão (use `host` para o scrape de outra máquina).
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            corpo = telemetria.prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+    
+        def log_message(self, format, *args):
+            # Sem log por requisição (o scrape é periódico)
+            pass
+    
+    servidor = ThreadingHTTPServer((host, porta), MetricsHandler)
+    threading.Thread(target=servidor.serve_forever, name='leads-metrics', daemon=True).start()
+    logger.info("Métricas em http://%s:%d/metrics", host, porta)
+    return servidor
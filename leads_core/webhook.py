@@ -0,0 +1,53 @@
+"""
+WEBHOOK DE ALTERAÇÕES - LUIS IMÓVEIS
+Endpoint HTTP que o gatilho onChange do Apps Script chama quando a planilha
+muda, para a atualização acontecer na hora em vez de esperar a sonda
+
+Exemplo de gatilho no Apps Script:
+    UrlFetchApp.fetch(URL + '/webhook', {method: 'post', headers: {'X-Leads-Token': TOKEN}});
+"""
+
+import hmac
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_CAMINHO = '/webhook'
+WEBHOOK_CABECALHO_TOKEN = 'X-Leads-Token'
+
+def start_webhook_server(porta, ao_notificar, token, host='127.0.0.1'):
+    """Serve POST /webhook em uma thread de fundo, chamando `ao_notificar()`; devolve o servidor
+    
+    Só aceita requisições com `token` no cabeçalho X-Leads-Token: sem token o
+    servidor não sobe, já que cada notificação custa uma leitura da planilha.
+    Escuta só em localhost por padrão (use `host` para expor atrás de um proxy).
+    """
+    if not token:
+        raise ValueError("Webhook exige um token (LEADS_WEBHOOK_TOKEN)")
+    
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path.split('?')[0] != WEBHOOK_CAMINHO:
+                self.send_error(404)
+                return
+            recebido = self.headers.get(WEBHOOK_CABECALHO_TOKEN, '')
+            if not hmac.compare_digest(recebido.encode('utf-8'), token.encode('utf-8')):
+                self.send_error(403)
+                return
+            
+            # Corpo ignorado: a notificação só acorda o refresher
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            ao_notificar()
+            self.send_response(202)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        
+        def log_message(self, format, *args):
+            pass
+    
+    servidor = ThreadingHTTPServer((host, porta), WebhookHandler)
+    threading.Thread(target=servidor.serve_forever, name='leads-webhook', daemon=True).start()
+    logger.info("Webhook de alterações em http://%s:%d%s", host, servidor.server_address[1], WEBHOOK_CAMINHO)
+    return servidor